@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Agent config templates, compiled once and rendered for several targets
+
+Each agent target (the Meta² config, a plain system prompt, an OpenAI-style
+chat payload with tool schemas, a markdown rules file) is a template: a
+nested dict/list/str structure whose strings hold {placeholders}. At import
+every template is compiled into a Python function that builds the whole
+output in one expression, so rendering is a single call per target. All
+targets render from one context built once per profile, and outputs are
+cached per (profile hash, target).
+
+Placeholders:
+    {editor}                      context value ("{name}" alone keeps its type)
+    {item.steps}                  nested key, or loop variable
+    {tools|join}                  filters: join[:sep], lines, map:key, json
+    {@system_prompt}              another target's output
+    {"$each": "workflows", "$as": "item", "$template": ...}   list per item
+"""
+import hashlib
+import json
+import marshal
+import re
+import threading
+from collections import OrderedDict
+
+# Bump whenever a template changes (cached configs are keyed on it)
+TEMPLATES_VERSION = 1
+
+DEFAULT_TARGET = "meta2"
+RENDER_CACHE_SIZE = 1024
+
+SYSTEM_PROMPT = (
+    "You are a coding agent working for {user_id}, who spends most of their time in a shell.\n"
+    "Editor: {editor}. Git workflow: {git_style}. API tool: {api_tool}.\n"
+    "Tools they use: {tools|join}.\n"
+    "{custom_prompts|map:prompt|lines}"
+)
+
+TARGET_TEMPLATES = {
+    "meta2": {
+        "user_id": "{user_id}",
+        "agent_preferences": {
+            "editor": "{editor}",
+            "git_workflow": "{git_style}",
+            "api_tool": "{api_tool}"
+        },
+        "suggested_tools": "{tools}",
+        "custom_prompts": "{custom_prompts}",
+        "workflow_templates": "{workflows}"
+    },
+    "system_prompt": SYSTEM_PROMPT,
+    "openai_chat": {
+        "messages": [{"role": "system", "content": "{@system_prompt}"}],
+        "tools": {
+            "$each": "workflows",
+            "$as": "workflow",
+            "$template": {
+                "type": "function",
+                "function": {
+                    "name": "{workflow.name}",
+                    "description": "Run {user_id}'s usual sequence: {workflow.steps|join:; }",
+                    "parameters": {"type": "object", "properties": {}}
+                }
+            }
+        }
+    },
+    "rules_markdown": (
+        "# Working with {user_id}\n\n"
+        "- Editor: {editor}\n"
+        "- Git workflow: {git_style}\n"
+        "- API tool: {api_tool}\n"
+        "- Tools: {tools|join}\n\n"
+        "## Instructions\n\n"
+        "{custom_prompts|map:prompt|lines}\n"
+    ),
+}
+
+PLACEHOLDER = re.compile(r"(\{\{|\}\}|\{[^{}]+\})")
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _value_code(field, loop_vars, deps):
+    path, *filters = field.split("|")
+    head, *keys = path.strip().split(".")
+    if head.startswith("@"):
+        deps.add(head[1:])
+        code = f"ctx[{head!r}]"
+    elif head in loop_vars:
+        code = head
+    else:
+        code = f"ctx[{head!r}]"
+    for key in keys:
+        code = f"{code}[{key!r}]"
+
+    for spec in filters:
+        name, _, arg = spec.partition(":")
+        if name == "join":
+            code = f"{(arg or ', ')!r}.join(map(str, {code}))"
+        elif name == "lines":
+            code = f"'\\n'.join('- ' + str(_x) for _x in {code})"
+        elif name == "map":
+            code = f"[_x[{arg!r}] for _x in {code}]"
+        elif name == "json":
+            code = f"_json.dumps({code})"
+        else:
+            raise TemplateError(f"Unknown template filter '{name}' in {{{field}}}")
+    return code
+
+
+def _string_code(text, loop_vars, deps):
+    parts = [part for part in PLACEHOLDER.split(text) if part]
+    if len(parts) == 1 and parts[0].startswith("{") and parts[0] not in ("{{", "}}"):
+        # A lone placeholder keeps the value's type (lists, dicts)
+        return _value_code(parts[0][1:-1], loop_vars, deps)
+    pieces = []
+    for part in parts:
+        if part in ("{{", "}}"):
+            pieces.append(repr(part[0]))
+        elif part.startswith("{") and part.endswith("}"):
+            pieces.append(f"str({_value_code(part[1:-1], loop_vars, deps)})")
+        else:
+            pieces.append(repr(part))
+    if len(pieces) == 1:
+        return pieces[0]
+    return f"''.join(({', '.join(pieces)},))"
+
+
+def _node_code(node, loop_vars, deps):
+    if isinstance(node, dict):
+        if "$each" in node:
+            var = node.get("$as", "item")
+            if not IDENTIFIER.match(var):
+                raise TemplateError(f"Invalid loop variable '{var}'")
+            body = _node_code(node["$template"], loop_vars + (var,), deps)
+            return f"[{body} for {var} in {_value_code(node['$each'], loop_vars, deps)}]"
+        items = ", ".join(f"{key!r}: {_node_code(value, loop_vars, deps)}" for key, value in node.items())
+        return "{" + items + "}"
+    if isinstance(node, list):
+        return "[" + ", ".join(_node_code(value, loop_vars, deps) for value in node) + "]"
+    if isinstance(node, str):
+        return _string_code(node, loop_vars, deps)
+    return repr(node)
+
+
+def compile_template(name, template):
+    """Compile one template into (render(ctx), names of targets it embeds)"""
+    deps = set()
+    source = f"def render(ctx):\n    return {_node_code(template, (), deps)}\n"
+    namespace = {"_json": json}
+    exec(compile(source, f"<agent template {name}>", "exec"), namespace)
+    return namespace["render"], frozenset(deps)
+
+
+def compile_templates(templates=TARGET_TEMPLATES):
+    compiled = {name: compile_template(name, template) for name, template in templates.items()}
+    for name, (_, deps) in compiled.items():
+        missing = deps - compiled.keys()
+        if missing:
+            raise TemplateError(f"Template '{name}' embeds unknown target(s): {', '.join(sorted(missing))}")
+    return compiled
+
+
+COMPILED_TEMPLATES = compile_templates()
+TARGETS = tuple(TARGET_TEMPLATES)
+
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+
+def profile_hash(profile):
+    """Stable digest of a profile's content"""
+    # marshal format 3+ emits back-references that depend on refcounts;
+    # format 2 serializes equal profiles to equal bytes
+    return hashlib.blake2b(marshal.dumps(profile, 2), digest_size=16).hexdigest()
+
+
+def unknown_targets(targets):
+    return [target for target in targets if target not in COMPILED_TEMPLATES]
+
+
+def _render(target, ctx):
+    if f"@{target}" not in ctx:
+        render, deps = COMPILED_TEMPLATES[target]
+        for dep in deps:
+            _render(dep, ctx)
+        ctx[f"@{target}"] = render(ctx)
+    return ctx[f"@{target}"]
+
+
+def render_targets(profile, targets, build_context):
+    """{target: output} for all targets from one profile
+
+    build_context(profile) is only called when some target misses the
+    cache, and then once for all of them. Cached outputs are shared, so
+    callers must not mutate them.
+    """
+    digest = profile_hash(profile)
+    outputs, missing = {}, []
+    with _render_cache_lock:
+        for target in targets:
+            output = _render_cache.get((digest, target))
+            if output is None:
+                missing.append(target)
+            else:
+                _render_cache.move_to_end((digest, target))
+                outputs[target] = output
+    if not missing:
+        return outputs
+
+    ctx = build_context(profile)
+    rendered = {target: _render(target, ctx) for target in missing}
+    with _render_cache_lock:
+        for target, output in rendered.items():
+            _render_cache[(digest, target)] = output
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    outputs.update(rendered)
+    return {target: outputs[target] for target in targets}
@@ -2,36 +2,198 @@
 Add to orchestrator/api.py - Meta² Onboarding Endpoint
 """
 
-from fastapi import APIRouter
-from pydantic import BaseModel
-from .onboard_feature import onboard_user
-
-router = APIRouter()
-
-class OnboardRequest(BaseModel):
-    user_id: str
-    include_history: bool = True
-
-@router.post("/orchestrator/onboard")
-async def onboard_endpoint(request: OnboardRequest):
-    """
-    Onboard new user by learning from their shell history
-    
-    Returns personalized agent configuration
-    """
-    result = onboard_user(request.user_id)
-    
-    return {
-        "run_id": f"onboard-{request.user_id}",
-        "reply": f"Onboarded user {request.user_id}",
-        "bits": {"A": 1, "U": 0, "P": 1, "E": 0, "delta": 0, "I": 0, "R": 0, "T": 1, "M": 0},
-        "status": "executed",
-        "status_line": "user onboarded; agent configured",
-        "onboarding_data": result
-    }
+# Sibling modules: relative inside the orchestrator package, top-level
+# otherwise (same convention as onboard_feature)
+if __package__:
+    from .onboard_feature import (DEFAULT_WATCH_FILE, WATCH_QUEUE_SIZE, agent_config, fleet_query,
+                                  onboard_user, profile_window, put_latest, search_history,
+                                  sync_profile, unwatch_user, user_history_files, watch_user,
+                                  watched_history_file)
+    from .profile_sync import encode_json
+else:
+    from onboard_feature import (DEFAULT_WATCH_FILE, WATCH_QUEUE_SIZE, agent_config, fleet_query,
+                                 onboard_user, profile_window, put_latest, search_history,
+                                 sync_profile, unwatch_user, user_history_files, watch_user,
+                                 watched_history_file)
+    from profile_sync import encode_json
+
+# Seconds between SSE keep-alive comments while the config is unchanged
+SSE_HEARTBEAT_SECONDS = 15
+
+# FastAPI and pydantic are imported on first access to `router` (PEP 562),
+# so workers that only need onboard_user don't pay for them at startup.
+_LAZY_NAMES = ("router", "OnboardRequest")
+
+
+def _build_router():
+    import asyncio
+    import json
+    from typing import List, Optional
+
+    from fastapi import APIRouter, Query, Request
+    from fastapi.responses import Response, StreamingResponse
+    from pydantic import BaseModel
+
+    router = APIRouter()
+
+    class OnboardRequest(BaseModel):
+        user_id: str
+        include_history: bool = True
+        # Synced copies of the user's history from several machines, as
+        # file names inside the user's directory under META2_HISTORY_ROOT
+        history_files: Optional[List[str]] = None
+        # Index parsed entries for window and search queries
+        persist_history: bool = False
+        # Optional window (epoch seconds or ISO-8601) for a scoped profile
+        since: Optional[str] = None
+        until: Optional[str] = None
+        # Trim the response, e.g. "preferences,tools" (add "agent_config" to keep it)
+        fields: Optional[str] = None
+        # Return only the profile delta since this version
+        since_version: Optional[int] = None
+        # Agent targets to render, e.g. ["meta2", "system_prompt", "openai_chat"]
+        targets: Optional[List[str]] = None
+
+    def encoded_response(payload, http_request):
+        """JSON response compressed per the client's Accept-Encoding"""
+        body, encoding = encode_json(payload, http_request.headers.get("accept-encoding"))
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @router.post("/orchestrator/onboard")
+    async def onboard_endpoint(request: OnboardRequest, http_request: Request):
+        """
+        Onboard new user by learning from their shell history
+        
+        Returns personalized agent configuration
+        """
+        history_files = None
+        if request.history_files:
+            history_files = user_history_files(request.user_id, request.history_files)
+            if isinstance(history_files, dict):
+                return history_files
+        result = onboard_user(request.user_id, history_files,
+                              persist_history=request.persist_history,
+                              fields=request.fields, since_version=request.since_version,
+                              targets=request.targets)
+        if "error" not in result and (request.since or request.until):
+            result["window_profile"] = profile_window(request.user_id, request.since, request.until)
+        
+        return encoded_response({
+            "run_id": f"onboard-{request.user_id}",
+            "reply": f"Onboarded user {request.user_id}",
+            "bits": {"A": 1, "U": 0, "P": 1, "E": 0, "delta": 0, "I": 0, "R": 0, "T": 1, "M": 0},
+            "status": "executed",
+            "status_line": "user onboarded; agent configured",
+            "onboarding_data": result
+        }, http_request)
+
+    @router.get("/orchestrator/onboard/{user_id}/profile")
+    async def profile_sync_endpoint(user_id: str, http_request: Request,
+                                    since_version: Optional[int] = None,
+                                    fields: Optional[str] = None):
+        """Versioned profile for polling clients: full, delta or unchanged"""
+        return encoded_response(sync_profile(user_id, since_version, fields), http_request)
+
+    @router.get("/orchestrator/onboard/{user_id}/config")
+    async def config_endpoint(user_id: str, http_request: Request, targets: Optional[str] = None):
+        """Agent config for an onboarded user, shared across workers via the profile cache"""
+        return encoded_response(agent_config(user_id, targets), http_request)
+
+    @router.get("/orchestrator/onboard/{user_id}/history")
+    async def history_window_endpoint(user_id: str, since: Optional[str] = None,
+                                      until: Optional[str] = None):
+        """Profile of a time window, answered from the history index"""
+        return profile_window(user_id, since, until)
+
+    @router.get("/orchestrator/onboard/{user_id}/search")
+    async def history_search_endpoint(user_id: str, q: str, since: Optional[str] = None,
+                                      until: Optional[str] = None,
+                                      limit: int = Query(50, le=500)):
+        """Full-text search over the user's indexed history"""
+        return search_history(user_id, q, since, until, limit)
+
+    @router.get("/orchestrator/onboard/{user_id}/watch")
+    async def watch_endpoint(user_id: str, history_file: str = DEFAULT_WATCH_FILE,
+                             persist_history: bool = False):
+        """
+        Server-sent events: the user's agent config, re-sent only when a
+        change in their shell history actually changes it
+
+        history_file names a file under the user's history directory, as
+        for onboarding; only onboarded users can be watched.
+        """
+        path = watched_history_file(user_id, history_file)
+        if isinstance(path, dict):
+            return path
+
+        async def events():
+            # The watcher thread hands configs to this loop; no thread waits
+            # per connection. Subscribing here means a stream that never
+            # starts never subscribes.
+            loop = asyncio.get_running_loop()
+            updates = asyncio.Queue(maxsize=WATCH_QUEUE_SIZE)
+            handle = watch_user(user_id, path, persist_history=persist_history,
+                                deliver=lambda config: loop.call_soon_threadsafe(put_latest, updates, config))
+            try:
+                while True:
+                    try:
+                        config = await asyncio.wait_for(updates.get(), SSE_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: agent_config\ndata: {json.dumps(config)}\n\n"
+            finally:
+                unwatch_user(user_id, handle)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @router.get("/orchestrator/fleet/{facet}")
+    async def fleet_share_endpoint(facet: str):
+        """Aggregate counts and share for tool, editor, git_style or api_tool"""
+        return fleet_query(facet)
+
+    @router.get("/orchestrator/fleet/{facet}/{value}")
+    async def fleet_users_endpoint(facet: str, value: str, limit: Optional[int] = None):
+        """User ids with a facet value, e.g. /orchestrator/fleet/tool/kubectl"""
+        return fleet_query(facet, value, limit)
+
+    globals().update(router=router, OnboardRequest=OnboardRequest)
+
+
+def __getattr__(name):
+    if name in _LAZY_NAMES:
+        _build_router()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Usage examples:
 """
+# Onboard and index history, then query last week / search it
+curl -X POST http://127.0.0.1:8080/orchestrator/onboard \
+  -H "X-API-Key: change-me" \
+  -H "Content-Type: application/json" \
+  -d '{"user_id": "dev123", "persist_history": true}'
+curl "http://127.0.0.1:8080/orchestrator/onboard/dev123/history?since=2024-05-01&until=2024-05-08"
+curl "http://127.0.0.1:8080/orchestrator/onboard/dev123/search?q=curl+internal"
+
+# Re-poll: only what changed since version 3, just two fields, compressed
+curl --compressed -H "Accept-Encoding: zstd, gzip" \
+  "http://127.0.0.1:8080/orchestrator/onboard/dev123/profile?since_version=3&fields=preferences,tools"
+
+# Current agent config (hot configs come from the cache shared by all workers)
+curl "http://127.0.0.1:8080/orchestrator/onboard/dev123/config"
+curl "http://127.0.0.1:8080/orchestrator/onboard/dev123/config?targets=system_prompt,openai_chat,rules_markdown"
+
+# Live agent config updates as the user's history grows (SSE)
+curl -N "http://127.0.0.1:8080/orchestrator/onboard/dev123/watch"
+
+# Fleet queries: who uses kubectl, editor share across the org
+curl "http://127.0.0.1:8080/orchestrator/fleet/tool/kubectl"
+curl "http://127.0.0.1:8080/orchestrator/fleet/editor"
+
 # Onboard a new user
 curl -X POST http://127.0.0.1:8080/orchestrator/onboard \
   -H "X-API-Key: change-me" \
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Similar-user query benchmark for Meta² Onboarding
+
+Fills a SimilarUserIndex with synthetic profiles and measures top-k query
+latency for each backend at the largest fleet it serves: the pure Python
+scan at PYTHON_MAX_USERS, NumPy postings at NUMPY_MAX_USERS (when NumPy is
+installed) and MinHash/LSH at USERS. Recall is the share of the exact top-k
+that the backend returns.
+"""
+import random
+import sys
+import time
+
+import similar_users
+from similar_users import NUMPY_MAX_USERS, PYTHON_MAX_USERS, SimilarUserIndex
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+QUERIES = 2000
+RECALL_QUERIES = 100
+QUERY_BUDGET_MS = 1.0
+MIN_RECALL = 0.6
+
+TOOLS = ["git", "gh", "curl", "wget", "docker", "kubectl", "python", "node", "npm",
+         "yarn", "cargo", "go", "code", "vim", "nvim", "tmux", "screen", "terraform",
+         "helm", "uv", "pnpm", "bazel", "make", "aws", "gcloud", "psql", "redis-cli"]
+CATEGORIES = ["git_workflow", "dev_tools", "api_usage", "file_ops"]
+
+
+def synthetic_features(rng):
+    """A profile-like sparse vector drawn from a few team archetypes"""
+    team = rng.randrange(40)
+    team_rng = random.Random(team)
+    favourites = team_rng.sample(TOOLS, 8)
+    used = favourites[:5] + rng.sample(TOOLS, 3)
+    features = {f"tool:{tool}": 1.0 for tool in used}
+    for tool in used:
+        features[f"cmd:{tool}"] = rng.random()
+    for category in CATEGORIES:
+        features[f"cat:{category}"] = rng.random()
+    return features
+
+
+def measure(users, use_numpy, rng):
+    index = SimilarUserIndex(use_numpy=use_numpy)
+    start = time.perf_counter()
+    for user in range(users):
+        index.add(f"user{user}", synthetic_features(rng))
+    build_time = time.perf_counter() - start
+
+    queries = [synthetic_features(rng) for _ in range(QUERIES)]
+    start = time.perf_counter()
+    for features in queries:
+        index.query(features, k=5)
+    query_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+    found = expected = 0
+    for features in queries[:RECALL_QUERIES]:
+        vector = similar_users._normalize(features)
+        exact = {user_id for user_id, _ in index._query_exact(vector, 5, set())}
+        found += len(exact & {user_id for user_id, _ in index.query(features, k=5)})
+        expected += len(exact)
+    return index.backend(), build_time, query_ms, found / expected
+
+
+def run_benchmark():
+    rng = random.Random(7)
+    cases = [("python", PYTHON_MAX_USERS, False)]
+    if similar_users.np is not None:
+        cases.append(("numpy", NUMPY_MAX_USERS, True))
+    cases.append(("minhash/lsh", USERS, True))
+
+    print("🔎 Similar-user index benchmark")
+    print("=" * 50)
+    if similar_users.np is None:
+        print("⚠️ NumPy not installed, skipping the NumPy backend")
+    for expected_backend, users, use_numpy in cases:
+        backend, build_time, query_ms, recall = measure(users, use_numpy, rng)
+        print(f"👥 {backend}: {users:,} profiles indexed in {build_time:.1f}s")
+        print(f"⚡ Top-5 query: {query_ms:.3f} ms (budget {QUERY_BUDGET_MS} ms), "
+              f"recall {recall:.2f} (min {MIN_RECALL})")
+        assert backend == expected_backend, f"{users:,} profiles answered by {backend}"
+        assert query_ms < QUERY_BUDGET_MS, f"{backend} query budget exceeded"
+        assert recall >= MIN_RECALL, f"{backend} recall below {MIN_RECALL}"
+    print("✅ Query budget and recall met")
+
+
+if __name__ == "__main__":
+    run_benchmark()
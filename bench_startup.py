@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for Meta² Onboarding
+
+Spawns fresh interpreters so every run pays the real import cost, then
+asserts the import-time and time-to-first-onboard budgets.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+IMPORT_BUDGET_SECONDS = 0.15
+FIRST_ONBOARD_BUDGET_SECONDS = 0.75
+HISTORY_LINES = 5000
+RUNS = 5
+
+# Modules that must never be pulled in just by importing the onboarding code
+HEAVY_MODULES = ("fastapi", "pydantic", "requests", "numpy")
+
+IMPORT_PROBE = f"""
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("onboard_feature", {str(REPO_DIR / 'onboard-feature.py')!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+import grok_real_test
+elapsed = time.perf_counter() - start
+heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def write_history(home, lines=HISTORY_LINES):
+    """Write a synthetic extended-format zsh history"""
+    commands = [
+        "git status", "git commit -m 'wip'", "gh pr create",
+        "curl -s https://api.example.com/v1/items", "python3 manage.py test",
+        "npm run build", "code .", "ls -la", "cd src", "docker ps",
+    ]
+    with open(Path(home) / ".zsh_history", 'w') as f:
+        for i in range(lines):
+            f.write(f": {1700000000 + i}:0;{commands[i % len(commands)]}\n")
+
+
+def time_import(env):
+    """Time importing the onboarding modules in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        capture_output=True, text=True, cwd=REPO_DIR, env=env, check=True
+    )
+    elapsed, heavy = result.stdout.split()[0], result.stdout.split()[1:]
+    return float(elapsed), heavy
+
+
+def time_first_onboard(env, workdir):
+    """Time a full CLI onboarding run, interpreter start included"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(REPO_DIR / "onboard-feature.py")],
+        capture_output=True, text=True, cwd=workdir, env=env, check=True
+    )
+    return time.perf_counter() - start
+
+
+def run_benchmark():
+    print("⏱️  Meta² Onboarding cold-start benchmark")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as home:
+        write_history(home)
+        env = dict(os.environ, HOME=home, PYTHONDONTWRITEBYTECODE="1")
+
+        imports, onboards, heavy_loaded = [], [], set()
+        for _ in range(RUNS):
+            elapsed, heavy = time_import(env)
+            imports.append(elapsed)
+            heavy_loaded.update(heavy)
+            onboards.append(time_first_onboard(env, home))
+
+    import_time = min(imports)
+    onboard_time = min(onboards)
+    print(f"📦 Import time:         {import_time * 1000:7.1f} ms (budget {IMPORT_BUDGET_SECONDS * 1000:.0f} ms)")
+    print(f"🚀 Time to 1st onboard: {onboard_time * 1000:7.1f} ms (budget {FIRST_ONBOARD_BUDGET_SECONDS * 1000:.0f} ms)")
+    print(f"🪶 Heavy modules loaded: {sorted(heavy_loaded) or 'none'}")
+
+    assert not heavy_loaded, f"heavy modules imported eagerly: {sorted(heavy_loaded)}"
+    assert import_time < IMPORT_BUDGET_SECONDS, "import-time budget exceeded"
+    assert onboard_time < FIRST_ONBOARD_BUDGET_SECONDS, "time-to-first-onboard budget exceeded"
+    print("✅ Cold-start budgets met")
+
+
+if __name__ == "__main__":
+    run_benchmark()
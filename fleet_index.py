@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Fleet-wide inverted index over onboarding profiles
+
+Maps (facet, value) -> user_ids for tools and preferences, plus a running
+count per (facet, value). The index is updated incrementally on every
+profile write, so "who uses kubectl" or "editor share across the org" is
+answered in time proportional to the result, without opening profiles.
+"""
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (facet, value, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_user ON postings(user_id);
+CREATE TABLE IF NOT EXISTS counts (
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (facet, value)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY
+) WITHOUT ROWID;
+"""
+
+# facet -> key in profile["preferences"]; "tool" is taken from profile["tools"]
+PREFERENCE_FACETS = {
+    "editor": "preferred_editor",
+    "git_style": "git_style",
+    "api_tool": "api_tool",
+}
+FACETS = ("tool",) + tuple(PREFERENCE_FACETS)
+
+
+def profile_postings(profile):
+    """The (facet, value) pairs a profile contributes to the index"""
+    postings = {("tool", tool) for tool in profile.get("tools", [])}
+    prefs = profile.get("preferences", {})
+    for facet, key in PREFERENCE_FACETS.items():
+        if key in prefs:
+            postings.add((facet, prefs[key]))
+    return postings
+
+
+class FleetIndex:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self, user_id, profile):
+        """Apply the difference between the user's indexed and new postings"""
+        new = profile_postings(profile)
+        with self.conn:
+            old = set(self.conn.execute(
+                "SELECT facet, value FROM postings WHERE user_id = ?", (user_id,)
+            ))
+            removed = [(f, v, user_id) for f, v in old - new]
+            added = [(f, v, user_id) for f, v in new - old]
+
+            self.conn.executemany(
+                "DELETE FROM postings WHERE facet = ? AND value = ? AND user_id = ?", removed)
+            self.conn.executemany(
+                "UPDATE counts SET n = n - 1 WHERE facet = ? AND value = ?",
+                [(f, v) for f, v, _ in removed])
+            self.conn.execute("DELETE FROM counts WHERE n <= 0")
+
+            self.conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", added)
+            self.conn.executemany(
+                "INSERT INTO counts VALUES (?, ?, 1) "
+                "ON CONFLICT(facet, value) DO UPDATE SET n = n + 1",
+                [(f, v) for f, v, _ in added])
+            self.conn.execute("INSERT OR IGNORE INTO users VALUES (?)", (user_id,))
+        return {"added": len(added), "removed": len(removed)}
+
+    def remove(self, user_id):
+        """Drop a user from the index"""
+        self.update(user_id, {})
+        with self.conn:
+            self.conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+
+    def users(self, facet, value, limit=None):
+        """User ids with the given facet value, e.g. ("tool", "kubectl")"""
+        sql = "SELECT user_id FROM postings WHERE facet = ? AND value = ? ORDER BY user_id"
+        params = [facet, value]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def user_postings(self, user_id):
+        """{facet: [values]} currently indexed for one user"""
+        result = {}
+        for facet, value in self.conn.execute(
+                "SELECT facet, value FROM postings WHERE user_id = ?", (user_id,)):
+            result.setdefault(facet, []).append(value)
+        return result
+
+    def counts(self, facet):
+        """{value: user count} for a facet, most common first"""
+        rows = self.conn.execute(
+            "SELECT value, n FROM counts WHERE facet = ? ORDER BY n DESC, value", (facet,))
+        return dict(rows)
+
+    def total_users(self):
+        return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def share(self, facet):
+        """Counts for a facet together with each value's share of all users"""
+        total = self.total_users()
+        counts = self.counts(facet)
+        return {
+            "facet": facet,
+            "total_users": total,
+            "counts": counts,
+            "share": {value: round(n / total, 4) for value, n in counts.items()} if total else {},
+        }
+
+
+def rebuild(profiles_dir, index_path=None):
+    """Index every existing profiles/*/profile.json (one-off backfill)"""
+    profiles_dir = Path(profiles_dir)
+    index_path = index_path or profiles_dir / "fleet.db"
+    indexed = 0
+    with FleetIndex(index_path) as index:
+        for profile_file in sorted(profiles_dir.glob("*/profile.json")):
+            with open(profile_file) as f:
+                profile = json.load(f)
+            index.update(profile.get("user_id", profile_file.parent.name), profile)
+            indexed += 1
+    return indexed
+
+
+if __name__ == "__main__":
+    profiles_dir = sys.argv[1] if len(sys.argv) > 1 else "profiles"
+    count = rebuild(profiles_dir)
+    print(f"✅ Indexed {count} profiles into {Path(profiles_dir) / 'fleet.db'}")
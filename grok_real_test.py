@@ -4,9 +4,10 @@ Real Grok-4 Testing with API Keys from Environment
 """
 import os
 import json
-import requests
 from pathlib import Path
 
+from profile_digest import DEFAULT_TOKEN_BUDGET, estimate_tokens, profile_digest
+
 class RealGrokTester:
     def __init__(self):
         # Load from environment or .env file
@@ -41,6 +42,7 @@ class RealGrokTester:
         }
         
         try:
+            import requests  # imported lazily: only real API calls need it
             response = requests.post(self.grok_api, headers=headers, json=payload)
             if response.status_code == 200:
                 return response.json()["choices"][0]["message"]["content"]
@@ -48,6 +50,22 @@ class RealGrokTester:
                 return f"❌ API Error {response.status_code}: {response.text}"
         except Exception as e:
             return f"❌ Request failed: {e}"
+    
+    def profile_prompt(self, profile, budget=DEFAULT_TOKEN_BUDGET):
+        """Profile-analysis prompt; the profile is sent as a token-budgeted digest"""
+        digest = profile_digest(profile, budget).replace("\n", "\n        ")
+        return f"""
+        Analyze this developer profile, distilled from their shell history:
+        
+        {digest}
+        
+        Which agent defaults (editor, git workflow, API tooling, workflows)
+        would suit this developer best, and what should the agent avoid?
+        """
+    
+    def analyze_profile(self, profile, budget=DEFAULT_TOKEN_BUDGET):
+        """Ask Grok about an onboarded profile with a bounded prompt size"""
+        return self.ask_grok(self.profile_prompt(profile, budget))
 
 def test_with_real_grok():
     """Test onboarding with real Grok-4"""
@@ -81,7 +99,18 @@ def test_with_real_grok():
     except FileNotFoundError:
         print("⚠️  No empirical evidence file found. Run empirical_evidence.py first")
     
-    # Test 2: Code review with real Grok
+    # Test 2: Analyze the onboarded profile (digest keeps the prompt small)
+    profile_file = Path('profiles') / 'dev123' / 'profile.json'
+    if profile_file.exists():
+        with open(profile_file) as f:
+            profile = json.load(f)
+        prompt = grok.profile_prompt(profile)
+        print(f"🧠 Asking Grok to analyze the onboarded profile (~{estimate_tokens(prompt)} prompt tokens)...")
+        print(f"📋 Grok Profile Analysis:\n{grok.ask_grok(prompt)}\n")
+    else:
+        print("⚠️  No onboarded profile found. Run onboard-feature.py first")
+    
+    # Test 3: Code review with real Grok
     code_review_prompt = """
     Review this ACTUAL Python code for shell history onboarding:
     
@@ -122,7 +151,7 @@ def test_with_real_grok():
     code_review = grok.ask_grok(code_review_prompt)
     print(f"🔧 Grok Code Review:\n{code_review}\n")
     
-    # Test 3: SOTA validation
+    # Test 4: SOTA validation
     sota_prompt = """
     Based on these REAL metrics for an AI agent onboarding system:
     
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Merge shell histories synced across several machines
+
+Each history file is read lazily, the files are combined with a heap-based
+k-way merge on timestamp, and copies of the same entry coming from different
+files are dropped using hashes kept for a bounded time window. Memory grows
+with the window, not with the size of the histories.
+"""
+import heapq
+import re
+from collections import deque
+
+# zsh EXTENDED_HISTORY line: ": <start>:<elapsed>;<command>"
+EXTENDED_LINE = re.compile(r'^: (\d+):\d+;(.*)$')
+
+# Entries this many seconds older than the newest one leave the dedup window
+DEDUP_WINDOW_SECONDS = 300
+# Hard cap on hashes held, for bursts of entries sharing a timestamp
+DEDUP_WINDOW_ENTRIES = 10000
+
+
+def parse_lines(lines, timestamp=0):
+    """Yield (timestamp, command) pairs from raw history lines
+
+    Lines without an extended-history header inherit the previous timestamp
+    (starting from `timestamp`) so they keep their position when merged with
+    other files.
+    """
+    for line in lines:
+        line = line.rstrip('\n')
+        match = EXTENDED_LINE.match(line)
+        if match:
+            timestamp = int(match.group(1))
+            line = match.group(2)
+        if line.strip():
+            yield timestamp, line
+
+
+def iter_history(path):
+    """Yield (timestamp, command) pairs from a zsh or plain shell history"""
+    with open(path, 'r', errors='ignore') as f:
+        yield from parse_lines(f)
+
+
+def _tagged(entries, source):
+    for timestamp, command in entries:
+        yield timestamp, source, command
+
+
+def merge_histories(paths, window_seconds=DEDUP_WINDOW_SECONDS,
+                    max_window=DEDUP_WINDOW_ENTRIES):
+    """Yield (timestamp, command) from all histories in timestamp order
+
+    An entry is a duplicate when another file has already produced the same
+    (timestamp, command) at least as many times, so repeats within a single
+    file survive while synced copies collapse to one.
+    """
+    streams = [_tagged(iter_history(path), source) for source, path in enumerate(paths)]
+    merged = heapq.merge(*streams, key=lambda entry: entry[0])
+
+    if len(streams) == 1:
+        for timestamp, _, command in merged:
+            yield timestamp, command
+        return
+
+    seen = {}          # entry hash -> {source: copies seen}
+    window = deque()   # (timestamp, entry hash), oldest first
+
+    for timestamp, source, command in merged:
+        while window and (window[0][0] < timestamp - window_seconds
+                          or len(window) > max_window):
+            seen.pop(window.popleft()[1], None)
+
+        key = hash((timestamp, command))
+        counts = seen.get(key)
+        if counts is None:
+            counts = seen[key] = {}
+            window.append((timestamp, key))
+
+        copies = counts.get(source, 0) + 1
+        counts[source] = copies
+        if copies > max((n for s, n in counts.items() if s != source), default=0):
+            yield timestamp, command
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Per-user indexed history store for Meta² Onboarding
+
+Parsed history entries are kept in SQLite with an index on the timestamp
+and an FTS5 table over the commands, so time-window and full-text queries
+are answered from the index instead of reparsing the raw history file.
+"""
+import sqlite3
+from datetime import datetime
+
+INSERT_BATCH = 5000
+
+# SQLite INTEGER range; window bounds beyond it are clamped
+EPOCH_MIN, EPOCH_MAX = -2 ** 63, 2 ** 63 - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    command TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts
+    USING fts5(command, content='entries', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, command) VALUES (new.id, new.command);
+END;
+"""
+
+
+def to_epoch(value):
+    """Accept epoch seconds or an ISO-8601 string; None passes through
+
+    Integers are clamped to SQLite's INTEGER range.
+    """
+    if value is None or isinstance(value, float):
+        return value
+    if not isinstance(value, int):
+        value = str(value).strip()
+        if value.lstrip('-').isdigit():
+            value = int(value)
+        else:
+            value = int(datetime.fromisoformat(value).timestamp())
+    return min(max(value, EPOCH_MIN), EPOCH_MAX)
+
+
+def fts_query(text):
+    """Quote each search term so user input can't break FTS5 syntax"""
+    terms = text.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE scans
+            self.has_fts = False
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, entries, replace=True):
+        """Persist (timestamp, command) entries while passing them through
+
+        Wrap the entry stream with this generator to index it in the same
+        pass that builds the profile. The transaction commits once the
+        stream is exhausted.
+        """
+        buffer = []
+        with self.conn:
+            if replace:
+                if self.has_fts:
+                    self.conn.execute("INSERT INTO entries_fts(entries_fts) VALUES ('delete-all')")
+                self.conn.execute("DELETE FROM entries")
+            for entry in entries:
+                buffer.append(entry)
+                if len(buffer) >= INSERT_BATCH:
+                    self.conn.executemany("INSERT INTO entries(ts, command) VALUES (?, ?)", buffer)
+                    buffer.clear()
+                yield entry
+            if buffer:
+                self.conn.executemany("INSERT INTO entries(ts, command) VALUES (?, ?)", buffer)
+
+    def append(self, entries):
+        """Add entries to the store, returning how many were written"""
+        count = 0
+        for _ in self.record(entries, replace=False):
+            count += 1
+        return count
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _window_clause(self, since, until, column="ts"):
+        clauses, params = [], []
+        if since is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(to_epoch(since))
+        if until is not None:
+            clauses.append(f"{column} < ?")
+            params.append(to_epoch(until))
+        return clauses, params
+
+    def window(self, since=None, until=None):
+        """Yield (timestamp, command) entries in [since, until) in time order"""
+        clauses, params = self._window_clause(since, until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = self.conn.execute(
+            f"SELECT ts, command FROM entries {where} ORDER BY ts, id", params
+        )
+        while True:
+            rows = cursor.fetchmany(INSERT_BATCH)
+            if not rows:
+                break
+            yield from rows
+
+    def search(self, query, since=None, until=None, limit=50):
+        """Full-text search over commands, newest first"""
+        if not query.strip():
+            return []
+        clauses, params = self._window_clause(since, until, column="e.ts")
+        if self.has_fts:
+            sql = ("SELECT e.ts, e.command FROM entries_fts f "
+                   "JOIN entries e ON e.id = f.rowid WHERE entries_fts MATCH ?")
+            params.insert(0, fts_query(query))
+        else:
+            terms = query.split()
+            sql = "SELECT e.ts, e.command FROM entries e WHERE 1"
+            for term in terms:
+                sql += " AND e.command LIKE ?"
+            params[:0] = [f"%{term}%" for term in terms]
+        for clause in clauses:
+            sql += f" AND {clause}"
+        sql += " ORDER BY e.ts DESC LIMIT ?"
+        params.append(int(limit))
+        return [{"timestamp": ts, "command": command}
+                for ts, command in self.conn.execute(sql, params)]
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tail a shell history file as it grows
+
+HistoryTailer blocks on inotify (Linux, via ctypes) until the history file
+changes, so an idle watcher uses no CPU; elsewhere it falls back to polling
+the file's size and mtime. Bursts of writes are debounced into one batch,
+and a rewritten or truncated file (zsh trims its history by replacing it) is
+reported so the caller can rebuild from scratch.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Quiet period that ends a burst of writes, and the longest a burst may delay a batch
+DEBOUNCE_SECONDS = 0.5
+MAX_DEBOUNCE_SECONDS = 5.0
+# Stat interval when inotify is unavailable
+POLL_INTERVAL_SECONDS = 2.0
+
+
+class _Inotify:
+    """Minimal inotify binding watching one directory for one file name"""
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch the directory: the history file itself may be replaced
+        directory = os.path.dirname(os.path.abspath(path))
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.name = os.fsencode(os.path.basename(path))
+
+    def wait(self, timeout):
+        """True if the watched file changed within timeout (None = forever)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return False
+            if self._drain():
+                return True
+
+    def _drain(self):
+        touched = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return touched
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name == self.name:
+                    touched = True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Poller:
+    """Fallback change detection by stat()"""
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.state = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self._stat()
+            if state != self.state:
+                self.state = state
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            step = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(0.0, step))
+
+    def close(self):
+        pass
+
+
+class HistoryTailer:
+    def __init__(self, path, debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL_SECONDS,
+                 use_inotify=True, from_end=False):
+        """from_end skips the current contents: only lines appended later are read"""
+        self.path = str(path)
+        self.debounce = debounce
+        self.offset = 0
+        self.inode = None
+        self.partial = b""
+        if from_end:
+            try:
+                st = os.stat(self.path)
+                self.inode, self.offset = st.st_ino, st.st_size
+            except FileNotFoundError:
+                pass
+        self.watcher = None
+        if use_inotify:
+            try:
+                self.watcher = _Inotify(self.path)
+            except (OSError, AttributeError):
+                self.watcher = None
+        if self.watcher is None:
+            self.watcher = _Poller(self.path, poll_interval)
+        self.mode = "inotify" if isinstance(self.watcher, _Inotify) else "poll"
+
+    def close(self):
+        self.watcher.close()
+
+    def read_new(self):
+        """Return (reset, lines): complete lines appended since the last read
+
+        reset is True whenever lines holds the whole file: on the first
+        read (unless the tailer started from the end), and after the file
+        was replaced or truncated.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False, []
+
+        reset = False
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            reset = True
+            self.inode, self.offset, self.partial = st.st_ino, 0, b""
+        if st.st_size == self.offset:
+            return reset, []
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+            self.offset = f.tell()
+
+        lines = (self.partial + data).split(b'\n')
+        # Keep an unterminated last line until the shell finishes writing it
+        self.partial = lines.pop()
+        return reset, [line.decode('utf-8', errors='ignore') for line in lines]
+
+    def wait(self, timeout=None):
+        """Block until the file changes, then until writes go quiet
+
+        Returns False if nothing changed within timeout.
+        """
+        if not self.watcher.wait(timeout):
+            return False
+        deadline = time.monotonic() + MAX_DEBOUNCE_SECONDS
+        while time.monotonic() < deadline and self.watcher.wait(self.debounce):
+            pass
+        return True
+
+    def follow(self, stop=None, timeout=1.0):
+        """Yield (reset, lines) batches, starting with whatever read_new() returns first
+
+        stop is an optional threading.Event; it is checked every `timeout`
+        seconds while idle.
+        """
+        reset, lines = self.read_new()
+        yield reset, lines
+        while stop is None or not stop.is_set():
+            if self.wait(timeout):
+                reset, lines = self.read_new()
+                if reset or lines:
+                    yield reset, lines
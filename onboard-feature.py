@@ -4,76 +4,284 @@ Meta² Onboarding Feature - Learn from user's shell history
 Usage: POST /orchestrator/onboard {"user_id": "dev123"}
 """
 import json
-import subprocess
+import os
+import queue
+import sys
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): profile writes are not serialized
+    fcntl = None
+
+# Sibling modules: relative inside the orchestrator package (deployed as
+# orchestrator/onboard_feature.py), top-level when run as a script
+if __package__:
+    from .agent_templates import DEFAULT_TARGET, TARGETS, TEMPLATES_VERSION, render_targets, unknown_targets
+    from .fleet_index import FACETS, PREFERENCE_FACETS, FleetIndex
+    from .history_merge import merge_histories, parse_lines
+    from .history_store import HistoryStore, to_epoch
+    from .history_watch import HistoryTailer
+    from .onboard_rules import load_rules
+    from .profile_cache import SharedCache
+    from .profile_sync import merge_patch, parse_fields, select_fields
+    from .redact import redact_entries
+    from .similar_users import FeatureStore, SimilarUserIndex, profile_features
+    from .tool_catalog import load_catalog
+else:
+    from agent_templates import DEFAULT_TARGET, TARGETS, TEMPLATES_VERSION, render_targets, unknown_targets
+    from fleet_index import FACETS, PREFERENCE_FACETS, FleetIndex
+    from history_merge import merge_histories, parse_lines
+    from history_store import HistoryStore, to_epoch
+    from history_watch import HistoryTailer
+    from onboard_rules import load_rules
+    from profile_cache import SharedCache
+    from profile_sync import merge_patch, parse_fields, select_fields
+    from redact import redact_entries
+    from similar_users import FeatureStore, SimilarUserIndex, profile_features
+    from tool_catalog import load_catalog
+
+# Number of most recent commands used for pattern analysis
+RECENT_COMMANDS = 100
+# argv0 frequencies kept in the profile (feature vector for similar users)
+TOP_COMMANDS = 25
+# Profiles with fewer commands get their config seeded from similar users
+SPARSE_COMMAND_COUNT = 50
+SIMILAR_USERS = 5
+# Past profile versions kept on disk for delta sync
+PROFILE_VERSIONS_KEPT = 20
+# Pending config updates kept per watch subscriber
+WATCH_QUEUE_SIZE = 16
+# History file watched under HISTORY_ROOT/<user_id>/ when the API names none
+DEFAULT_WATCH_FILE = ".zsh_history"
+
+PROFILES_DIR = Path("profiles")
+FLEET_INDEX_PATH = PROFILES_DIR / "fleet.db"
+# Memory-mapped cache of parsed profiles and configs shared by all workers
+# (SharedCache adds its layout to the file name)
+PROFILE_CACHE_PATH = PROFILES_DIR / "cache.shm"
+# History files API callers may name live under <root>/<user_id>/
+HISTORY_ROOT = Path(os.environ.get("META2_HISTORY_ROOT", "histories"))
+
+# Per-process nearest-neighbour index, synced incrementally from fleet.db
+_similar_index = SimilarUserIndex()
+_shared_cache = None
+# Running history watchers by user_id
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+def shared_cache():
+    """The process's handle on the shared profile cache, or None if unavailable"""
+    global _shared_cache
+    if _shared_cache is None:
+        try:
+            PROFILES_DIR.mkdir(exist_ok=True)
+            _shared_cache = SharedCache(PROFILE_CACHE_PATH)
+        except OSError:
+            _shared_cache = False
+    return _shared_cache or None
+
+def write_json(path, data):
+    """Write JSON through a temp file and os.replace, so readers see old or new"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
 class Meta2Onboarding:
     def __init__(self, user_id):
         self.user_id = user_id
-        self.profile_dir = Path(f"profiles/{user_id}")
+        self.profile_dir = PROFILES_DIR / user_id
         self.profile_dir.mkdir(parents=True, exist_ok=True)
     
-    def extract_user_patterns(self):
-        """Extract patterns from user's shell history"""
-        # Get zsh history
-        history_cmd = [
-            "perl", "-nle", 
-            "if(/^: (\\d+):\\d+;(.*)$/){print scalar localtime($1) . '  ' . $2} else {print}",
-            str(Path.home() / ".zsh_history")
-        ]
+    def history_store(self):
+        """Open the user's indexed history store"""
+        return HistoryStore(self.profile_dir / "history.db")
+    
+    def has_history_store(self):
+        return (self.profile_dir / "history.db").exists()
+    
+    def extract_user_patterns(self, history_files=None, persist=False):
+        """Extract patterns from user's shell history
+        
+        Several history files (e.g. synced from different machines) are
+        merged on timestamp and de-duplicated before analysis. Secrets are
+        redacted before anything is stored. With persist=True the parsed
+        entries are also written to the indexed history store in the same
+        pass.
+        """
+        if not history_files:
+            history_files = [Path.home() / ".zsh_history"]
         
         try:
-            result = subprocess.run(history_cmd, capture_output=True, text=True, errors='ignore')
-            commands = result.stdout.strip().split('\n')
-            
-            # Analyze patterns
-            patterns = self.analyze_command_patterns(commands)
-            
-            # Save user profile
-            profile = {
-                "user_id": self.user_id,
-                "command_count": len(commands),
-                "patterns": patterns,
-                "preferences": self.infer_preferences(patterns),
-                "tools": self.detect_tools(commands)
-            }
-            
-            with open(self.profile_dir / "profile.json", 'w') as f:
-                json.dump(profile, f, indent=2)
+            entries = redact_entries(merge_histories(history_files))
+            if persist:
+                with self.history_store() as store:
+                    profile = self.build_profile(store.record(entries))
+            else:
+                profile = self.build_profile(entries)
             
+            self.save_profile(profile)
             return profile
             
         except Exception as e:
             return {"error": f"Failed to extract patterns: {e}"}
     
-    def analyze_command_patterns(self, commands):
-        """Analyze user's command patterns"""
-        patterns = {
-            "git_workflow": [],
-            "dev_tools": [],
-            "api_usage": [],
-            "file_ops": []
-        }
+    def profile_stamp(self):
+        """mtime of profile.json, the version of its cached copies (None if absent)"""
+        try:
+            return (self.profile_dir / "profile.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def load_profile(self, version=None):
+        """Read the current profile, or a retained past version
         
-        for cmd in commands[-100:]:  # Last 100 commands
-            if not cmd.strip():
-                continue
-                
-            # Extract command part (after timestamp)
-            if '  ' in cmd:
-                command = cmd.split('  ', 1)[1]
-            else:
-                command = cmd
+        The current profile is served from the shared cache while
+        profile.json is unchanged.
+        """
+        if version is not None:
+            profile_file = self.profile_dir / "versions" / f"{int(version)}.json"
+            if not profile_file.exists():
+                return None
+            with open(profile_file) as f:
+                return json.load(f)
+        
+        stamp = self.profile_stamp()
+        if stamp is None:
+            return None
+        cache = shared_cache()
+        key = f"profile:{self.user_id}"
+        if cache is not None:
+            profile = cache.get(key, stamp)
+            if profile is not None:
+                return profile
+        with open(self.profile_dir / "profile.json") as f:
+            profile = json.load(f)
+        if cache is not None:
+            cache.put(key, profile, stamp)
+        return profile
+    
+    def save_profile(self, profile):
+        """Write the user profile as a new version and update the fleet index
+        
+        A profile identical to the stored one keeps its version and is not
+        rewritten, so clients polling for changes see none. Workers saving
+        the same user take turns (flock), so versions stay monotonic, and
+        files are replaced atomically, so readers never see a partial one.
+        """
+        with self.profile_lock():
+            current = self.load_profile()
+            version = 0
+            if current is not None:
+                version = current.get("version", 0)
+                unversioned = {k: v for k, v in profile.items() if k != "version"}
+                if unversioned == {k: v for k, v in current.items() if k != "version"}:
+                    profile["version"] = version
+                    return profile
+            
+            profile["version"] = version + 1
+            versions_dir = self.profile_dir / "versions"
+            versions_dir.mkdir(exist_ok=True)
+            # The version file first: profile.json never names a version
+            # that is not on disk yet
+            write_json(versions_dir / f"{profile['version']}.json", profile)
+            write_json(self.profile_dir / "profile.json", profile)
+            expired = versions_dir / f"{profile['version'] - PROFILE_VERSIONS_KEPT}.json"
+            if expired.exists():
+                expired.unlink()
+            cache = shared_cache()
+            if cache is not None:
+                cache.put(f"profile:{self.user_id}", profile, self.profile_stamp())
             
-            # Categorize
-            if command.startswith('git'):
-                patterns["git_workflow"].append(command)
-            elif any(tool in command for tool in ['curl', 'http', 'api']):
-                patterns["api_usage"].append(command)
-            elif any(tool in command for tool in ['python', 'node', 'npm', 'cargo']):
-                patterns["dev_tools"].append(command)
-            elif any(op in command for op in ['cd', 'ls', 'mkdir', 'cp', 'mv']):
-                patterns["file_ops"].append(command)
+            with FleetIndex(FLEET_INDEX_PATH) as index:
+                index.update(self.user_id, profile)
+            with FeatureStore(FLEET_INDEX_PATH) as store:
+                store.put(self.user_id, profile_features(profile))
+        return profile
+    
+    @contextmanager
+    def profile_lock(self):
+        """Exclusive lock on the user's profile across processes and threads"""
+        if fcntl is None:
+            yield
+            return
+        # One open file description per holder, so threads exclude each other too
+        fd = os.open(self.profile_dir / ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+    
+    def profile_view(self, profile, fields=None, since_version=None):
+        """Versioned, field-selected view of a profile
+        
+        Returns the full (selected) profile, a merge-patch delta from
+        since_version when that version is still retained, or just the
+        version when the client is already up to date.
+        """
+        version = profile.get("version", 0)
+        view = {"version": version}
+        if since_version is not None:
+            since_version = int(since_version)
+            if since_version == version:
+                view["unchanged"] = True
+                return view
+            old = self.load_profile(since_version)
+            if old is not None:
+                view["since_version"] = since_version
+                view["delta"] = merge_patch(select_fields(old, fields), select_fields(profile, fields))
+                return view
+        view["profile"] = select_fields(profile, fields)
+        return view
+    
+    def build_profile(self, entries):
+        """Build a profile from (timestamp, command) entries in one pass"""
+        return ProfileBuilder(self).feed(entries).profile()
+    
+    def window_profile(self, since=None, until=None):
+        """Build a profile for [since, until) from the history store only"""
+        if not self.has_history_store():
+            return {"error": "No history index found. Onboard with persist_history first."}
+        error = window_error(since, until)
+        if error:
+            return error
+        
+        with self.history_store() as store:
+            profile = self.build_profile(store.window(since, until))
+        profile["window"] = {"since": since, "until": until}
+        return profile
+    
+    def search_history(self, query, since=None, until=None, limit=50):
+        """Full-text search over the user's indexed history"""
+        if not self.has_history_store():
+            return {"error": "No history index found. Onboard with persist_history first."}
+        error = window_error(since, until)
+        if error:
+            return error
+        
+        with self.history_store() as store:
+            return {"query": query, "results": store.search(query, since, until, limit)}
+    
+    def categorize_commands(self, commands):
+        """Sort bare commands into pattern categories"""
+        rules = load_rules()
+        patterns = {name: [] for name in rules["category_names"]}
+        
+        for command in commands:
+            # Categorize (first matching rule wins)
+            for name, is_prefix, needles in rules["categories"]:
+                if is_prefix:
+                    matched = command.startswith(needles)
+                else:
+                    matched = any(needle in command for needle in needles)
+                if matched:
+                    patterns[name].append(command)
+                    break
         
         return patterns
     
@@ -92,70 +300,117 @@ class Meta2Onboarding:
         
         command_text = ' '.join(all_commands)
         
-        # Infer preferences
-        if 'code' in command_text or 'vscode' in command_text:
-            prefs["preferred_editor"] = "vscode"
-        elif 'vim' in command_text or 'nvim' in command_text:
-            prefs["preferred_editor"] = "vim"
+        # Infer preferences (first matching hint wins)
+        for pref, hints in load_rules()["preference_hints"].items():
+            for value, needles in hints:
+                if any(needle in command_text for needle in needles):
+                    prefs[pref] = value
+                    break
         
-        if 'gh ' in command_text:
-            prefs["git_style"] = "github_cli"
-        elif len(patterns["git_workflow"]) > 5:
+        if prefs["git_style"] == "unknown" and len(patterns["git_workflow"]) > 5:
             prefs["git_style"] = "command_line"
         
-        if 'curl' in command_text:
-            prefs["api_tool"] = "curl"
-        elif 'http' in command_text:
-            prefs["api_tool"] = "httpie"
-        
         return prefs
     
-    def detect_tools(self, commands):
-        """Detect tools user frequently uses"""
-        tools = set()
+    def generate_agent_config(self, targets=None):
+        """Generate personalized agent config
         
-        for cmd in commands:
-            if not cmd.strip():
-                continue
-            
-            # Extract first word (command)
-            first_word = cmd.split()[0] if cmd.split() else ""
-            
-            # Common dev tools
-            dev_tools = {
-                'git', 'gh', 'curl', 'wget', 'docker', 'kubectl', 
-                'python', 'node', 'npm', 'yarn', 'cargo', 'go',
-                'code', 'vim', 'nvim', 'tmux', 'screen'
-            }
-            
-            if first_word in dev_tools:
-                tools.add(first_word)
+        By default this is the Meta² config. With targets (e.g.
+        "system_prompt,openai_chat") every listed agent target is rendered
+        from the same profile in one pass and returned under "targets".
+        Configs are cached alongside the profile they were built from,
+        except seeded ones, which also depend on other users' profiles.
+        """
+        names = parse_fields(targets) or [DEFAULT_TARGET]
+        unknown = unknown_targets(names)
+        if unknown:
+            return {"error": f"Unknown agent target '{unknown[0]}'. Use one of: {', '.join(TARGETS)}"}
         
-        return list(tools)
-    
-    def generate_agent_config(self):
-        """Generate personalized agent config"""
-        profile_file = self.profile_dir / "profile.json"
-        if not profile_file.exists():
+        stamp = self.profile_stamp()
+        if stamp is None:
             return {"error": "No profile found. Run onboarding first."}
+        cache = shared_cache()
+        key = (f"config:v{load_rules()['version']}.{TEMPLATES_VERSION}:"
+               f"{','.join(names) if targets is not None else ''}:{self.user_id}")
+        if cache is not None:
+            config = cache.get(key, stamp)
+            if config is not None:
+                return config
         
-        with open(profile_file) as f:
-            profile = json.load(f)
+        profile = self.load_profile()
+        if profile is None:
+            return {"error": "No profile found. Run onboarding first."}
         
-        # Generate config based on user patterns
-        config = {
+        seeded_from = []
+        if profile["command_count"] < SPARSE_COMMAND_COUNT:
+            profile, seeded_from = self.seed_from_similar_users(profile)
+        
+        # Render every requested target from one context
+        outputs = render_targets(profile, names, self.template_context)
+        if targets is None:
+            config = dict(outputs[DEFAULT_TARGET])
+        else:
+            config = {"user_id": self.user_id, "targets": outputs}
+        if seeded_from:
+            config["seeded_from"] = seeded_from
+        elif cache is not None:
+            cache.put(key, config, stamp)
+        
+        return config
+    
+    def template_context(self, profile):
+        """Values the agent target templates render from"""
+        return {
             "user_id": self.user_id,
-            "agent_preferences": {
-                "editor": profile["preferences"]["preferred_editor"],
-                "git_workflow": profile["preferences"]["git_style"],
-                "api_tool": profile["preferences"]["api_tool"]
-            },
-            "suggested_tools": profile["tools"],
+            "editor": profile["preferences"]["preferred_editor"],
+            "git_style": profile["preferences"]["git_style"],
+            "api_tool": profile["preferences"]["api_tool"],
+            "tools": profile["tools"],
             "custom_prompts": self.generate_custom_prompts(profile),
-            "workflow_templates": self.generate_workflows(profile)
+            "workflows": self.generate_workflows(profile)
         }
+    
+    def similar_users(self, profile, k=SIMILAR_USERS):
+        """Closest colleagues by profile features as [(user_id, cosine)]"""
+        with FeatureStore(FLEET_INDEX_PATH) as store:
+            _similar_index.sync(store)
+        return _similar_index.query(profile_features(profile), k, exclude=(self.user_id,))
+    
+    def seed_from_similar_users(self, profile):
+        """Fill a sparse profile's unknown preferences and tools from neighbours
         
-        return config
+        Neighbours vote with their cosine similarity as weight. Returns the
+        seeded copy of the profile and the neighbours used.
+        """
+        neighbours = self.similar_users(profile)
+        if not neighbours:
+            return profile, []
+        
+        with FleetIndex(FLEET_INDEX_PATH) as index:
+            postings = [(index.user_postings(uid), score) for uid, score in neighbours]
+        
+        seeded = dict(profile, preferences=dict(profile["preferences"]), tools=list(profile["tools"]))
+        for facet, pref in PREFERENCE_FACETS.items():
+            if seeded["preferences"].get(pref, "unknown") != "unknown":
+                continue
+            votes = Counter()
+            for values, score in postings:
+                for value in values.get(facet, []):
+                    if value != "unknown":
+                        votes[value] += score
+            if votes:
+                seeded["preferences"][pref] = votes.most_common(1)[0][0]
+        
+        # Suggest tools that most of the (similarity-weighted) neighbours use
+        tool_votes = Counter()
+        for values, score in postings:
+            for tool in values.get("tool", []):
+                tool_votes[tool] += score
+        majority = sum(score for _, score in neighbours) / 2
+        seeded["tools"] += [tool for tool, weight in tool_votes.most_common()
+                            if weight >= majority and tool not in seeded["tools"]]
+        
+        return seeded, [{"user_id": uid, "similarity": score} for uid, score in neighbours]
     
     def generate_custom_prompts(self, profile):
         """Generate custom prompts based on user patterns"""
@@ -188,28 +443,343 @@ class Meta2Onboarding:
         
         return workflows
 
+class ProfileBuilder:
+    """Streaming profile state that can keep taking new history entries"""
+    
+    def __init__(self, onboarder):
+        self.onboarder = onboarder
+        self.recent = deque(maxlen=RECENT_COMMANDS)
+        self.argv0_counts = Counter()
+        self.command_count = 0
+        self.last_timestamp = 0
+    
+    def feed(self, entries):
+        """Consume (timestamp, command) entries"""
+        for timestamp, command in entries:
+            self.command_count += 1
+            self.last_timestamp = timestamp
+            self.recent.append(command)
+            self.argv0_counts[command.split(None, 1)[0]] += 1
+        return self
+    
+    @classmethod
+    def from_profile(cls, onboarder, profile):
+        """Builder resuming from a stored profile
+        
+        The profile keeps only the top commands and categorized recent
+        ones, so this is approximate: tools outside the top commands are
+        kept with a zero count, and recent commands lose their order across
+        categories.
+        """
+        builder = cls(onboarder)
+        builder.command_count = profile.get("command_count", 0)
+        builder.last_timestamp = profile.get("last_timestamp", 0)
+        for commands in profile.get("patterns", {}).values():
+            builder.recent.extend(commands)
+        builder.argv0_counts.update(profile.get("top_commands", {}))
+        for tool in profile.get("tools", []):
+            builder.argv0_counts.setdefault(tool, 0)
+        return builder
+    
+    def profile(self):
+        """Snapshot the profile for everything fed so far"""
+        catalog = load_catalog()
+        patterns = self.onboarder.categorize_commands(self.recent)
+        return {
+            "user_id": self.onboarder.user_id,
+            "command_count": self.command_count,
+            "last_timestamp": self.last_timestamp,
+            "patterns": patterns,
+            "preferences": self.onboarder.infer_preferences(patterns),
+            "tools": [argv0 for argv0 in self.argv0_counts if catalog.is_tool(argv0)],
+            "top_commands": {argv0: count for argv0, count in self.argv0_counts.most_common(TOP_COMMANDS)
+                             if count}
+        }
+
+class ProfileWatcher:
+    """Keep a user's profile and agent config current by tailing their history
+    
+    The profile may have been onboarded from several merged files, so the
+    watcher never rebuilds it from the one file it tails: it resumes from
+    the history store (or the stored profile), reads only lines appended
+    after it started, and adds them. New lines are fed into a
+    ProfileBuilder incrementally; subscribers are only notified when the
+    generated agent config actually changes.
+    """
+    
+    def __init__(self, user_id, history_file, persist_history=False, use_inotify=True):
+        self.onboarder = Meta2Onboarding(user_id)
+        self.history_file = history_file
+        self.persist_history = persist_history
+        self.use_inotify = use_inotify
+        self.builder = ProfileBuilder(self.onboarder)
+        self.config = None
+        self.subscribers = {}   # handle -> deliver(config)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def subscribe(self, deliver=None):
+        """Receive each new agent config (current one first)
+        
+        Returns a queue the configs are put on, or with deliver, calls
+        deliver(config) from the watcher thread and returns deliver. Either
+        is the handle to pass to unsubscribe().
+        """
+        if deliver is None:
+            updates = queue.Queue(maxsize=WATCH_QUEUE_SIZE)
+            handle, deliver = updates, lambda config: put_latest(updates, config)
+        else:
+            handle = deliver
+        with self.lock:
+            if self.config is not None:
+                deliver(self.config)
+            self.subscribers[handle] = deliver
+        return handle
+    
+    def unsubscribe(self, handle):
+        """Drop a subscription; returns how many are left"""
+        with self.lock:
+            self.subscribers.pop(handle, None)
+            return len(self.subscribers)
+    
+    def _notify(self, config):
+        with self.lock:
+            self.config = config
+            for deliver in self.subscribers.values():
+                deliver(config)
+    
+    def resume(self):
+        """Builder holding what the user's profile was built from"""
+        if self.onboarder.has_history_store():
+            with self.onboarder.history_store() as store:
+                return ProfileBuilder(self.onboarder).feed(store.window())
+        profile = self.onboarder.load_profile()
+        if profile is None:
+            return ProfileBuilder(self.onboarder)
+        return ProfileBuilder.from_profile(self.onboarder, profile)
+    
+    def apply(self, reset, lines):
+        """Feed a batch of raw history lines; True if the config changed"""
+        last = self.builder.last_timestamp
+        if reset:
+            # The file was rewritten (zsh trims history by replacing it):
+            # only entries newer than anything seen are new
+            entries = [entry for entry in parse_lines(lines) if last and entry[0] > last]
+        else:
+            entries = list(parse_lines(lines, last))
+        entries = list(redact_entries(entries))
+        if not entries:
+            return False
+        
+        if self.persist_history and self.onboarder.has_history_store():
+            with self.onboarder.history_store() as store:
+                store.append(entries)
+        self.builder.feed(entries)
+        self.onboarder.save_profile(self.builder.profile())
+        
+        config = self.onboarder.generate_agent_config()
+        if config == self.config:
+            return False
+        self._notify(config)
+        return True
+    
+    def run(self):
+        """Tail the history until stop() is called"""
+        try:
+            self.builder = self.resume()
+            if self.onboarder.profile_stamp() is not None:
+                self._notify(self.onboarder.generate_agent_config())
+        except Exception as e:
+            print(f"⚠️  Watch resume failed for {self.onboarder.user_id}: {e}", file=sys.stderr)
+        tailer = HistoryTailer(self.history_file, use_inotify=self.use_inotify, from_end=True)
+        try:
+            for reset, lines in tailer.follow(self.stop_event):
+                try:
+                    self.apply(reset, lines)
+                except Exception as e:
+                    print(f"⚠️  Watch update failed for {self.onboarder.user_id}: {e}", file=sys.stderr)
+        finally:
+            tailer.close()
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=f"watch-{self.onboarder.user_id}", daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self, wait=True):
+        self.stop_event.set()
+        if wait and self.thread is not None:
+            self.thread.join()
+
 # API endpoint integration
-def onboard_user(user_id):
-    """Main onboarding function for Meta² API"""
+def onboard_user(user_id, history_files=None, persist_history=False,
+                 fields=None, since_version=None, targets=None):
+    """Main onboarding function for Meta² API
+    
+    fields (e.g. "preferences,tools") trims the returned profile and drops
+    the agent config unless "agent_config" is listed; since_version returns
+    only the profile delta since a version the client already holds;
+    targets renders the agent config for several agent targets at once.
+    """
     onboarder = Meta2Onboarding(user_id)
     
     # Extract patterns
-    profile = onboarder.extract_user_patterns()
+    profile = onboarder.extract_user_patterns(history_files, persist=persist_history)
     if "error" in profile:
         return profile
     
     # Generate config
-    config = onboarder.generate_agent_config()
+    config = onboarder.generate_agent_config(targets)
     
-    return {
+    fields = parse_fields(fields)
+    result = {
         "status": "onboarded",
         "user_id": user_id,
-        "profile": profile,
-        "agent_config": config,
-        "message": f"Learned from {profile['command_count']} commands"
+        **onboarder.profile_view(profile, fields, since_version)
     }
+    if fields is None or "agent_config" in fields:
+        result["agent_config"] = config
+    result["message"] = f"Learned from {profile['command_count']} commands"
+    return result
+
+def user_history_files(user_id, names):
+    """Resolve history file names sent to the API inside the user's history root
+    
+    Names are relative to HISTORY_ROOT/<user_id>; anything resolving outside
+    it (absolute paths, "..", symlinks) is rejected so API callers cannot
+    read arbitrary files on the server.
+    """
+    root = HISTORY_ROOT.resolve()
+    user_root = (root / user_id).resolve()
+    if user_root.parent != root:
+        return {"error": f"Invalid user_id '{user_id}'"}
+    
+    paths = []
+    for name in names:
+        path = (user_root / name).resolve()
+        if user_root not in path.parents:
+            return {"error": f"History file '{name}' is outside the history directory for {user_id}"}
+        paths.append(path)
+    return paths
+
+def sync_profile(user_id, since_version=None, fields=None):
+    """Current profile version for a polling client: full, delta or unchanged"""
+    onboarder = Meta2Onboarding(user_id)
+    profile = onboarder.load_profile()
+    if profile is None:
+        return {"error": "No profile found. Run onboarding first."}
+    return {"user_id": user_id, **onboarder.profile_view(profile, parse_fields(fields), since_version)}
+
+def agent_config(user_id, targets=None):
+    """Current agent config, served from the shared cache when hot"""
+    return Meta2Onboarding(user_id).generate_agent_config(targets)
+
+def window_error(since, until):
+    """Error dict for a malformed since/until, or None"""
+    for name, value in (("since", since), ("until", until)):
+        try:
+            to_epoch(value)
+        except (ValueError, OverflowError, OSError):
+            return {"error": f"Invalid {name} '{value}': use epoch seconds or an ISO-8601 date"}
+    return None
+
+def profile_window(user_id, since=None, until=None):
+    """Profile of what the user did in [since, until), served from the index"""
+    return Meta2Onboarding(user_id).window_profile(since, until)
+
+def search_history(user_id, query, since=None, until=None, limit=50):
+    """Search the user's indexed history"""
+    return Meta2Onboarding(user_id).search_history(query, since, until, limit)
+
+def fleet_query(facet, value=None, limit=None):
+    """Fleet-wide lookup: users with a facet value, or the facet's share"""
+    if facet not in FACETS:
+        return {"error": f"Unknown facet '{facet}'. Use one of: {', '.join(FACETS)}"}
+    
+    with FleetIndex(FLEET_INDEX_PATH) as index:
+        if value is None:
+            return index.share(facet)
+        users = index.users(facet, value, limit)
+        return {"facet": facet, "value": value, "count": len(users), "user_ids": users}
+
+def put_latest(updates, config):
+    """Put on a queue (thread or asyncio) without blocking
+    
+    A slow subscriber loses its oldest update rather than stall the watcher.
+    """
+    while updates.full():
+        try:
+            updates.get_nowait()
+        except queue.Empty:
+            break
+    updates.put_nowait(config)
+
+def watched_history_file(user_id, name=DEFAULT_WATCH_FILE):
+    """History file an API caller may watch for a user, or {"error": ...}
+    
+    Like onboarding history_files it must live under HISTORY_ROOT/<user_id>,
+    and the user must already be onboarded: watching never creates a
+    profile or history index.
+    """
+    paths = user_history_files(user_id, [name])
+    if isinstance(paths, dict):
+        return paths
+    if not (PROFILES_DIR / user_id / "profile.json").is_file():
+        return {"error": f"User '{user_id}' is not onboarded. Onboard before watching."}
+    if not paths[0].is_file():
+        return {"error": f"No history file '{name}' for {user_id}"}
+    return paths[0]
+
+def watch_user(user_id, history_file, persist_history=False, deliver=None):
+    """Subscribe to a user's agent config updates, starting their watcher if needed
+    
+    history_file is tailed as given; API callers resolve it through
+    watched_history_file() first. Returns the subscription handle (see
+    ProfileWatcher.subscribe); pass it to unwatch_user() when done.
+    """
+    key = (user_id, str(history_file))
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None or not watcher.thread.is_alive():
+            watcher = ProfileWatcher(user_id, history_file, persist_history).start()
+            _watchers[key] = watcher
+        return watcher.subscribe(deliver)
+
+def unwatch_user(user_id, handle):
+    """End a subscription; a watcher stops with its last subscriber"""
+    with _watchers_lock:
+        for key, watcher in _watchers.items():
+            if key[0] == user_id and handle in watcher.subscribers:
+                break
+        else:
+            return
+        if watcher.unsubscribe(handle):
+            return
+        del _watchers[key]
+    # Don't wait: the thread notices within a second, and callers may be
+    # on an event loop
+    watcher.stop(wait=False)
+
+def stop_watching(user_id):
+    with _watchers_lock:
+        keys = [key for key in _watchers if key[0] == user_id]
+        watchers = [_watchers.pop(key) for key in keys]
+    for watcher in watchers:
+        watcher.stop()
 
 if __name__ == "__main__":
-    # Test onboarding
-    result = onboard_user("dev123")
-    print(json.dumps(result, indent=2))
+    if sys.argv[1:2] == ["--watch"]:
+        # Live mode: print the agent config each time it changes
+        history_file = sys.argv[2] if len(sys.argv) > 2 else Path.home() / ".zsh_history"
+        updates = watch_user("dev123", history_file)
+        print("👀 Watching shell history (Ctrl-C to stop)...")
+        try:
+            while True:
+                print(json.dumps(updates.get(), indent=2))
+        except KeyboardInterrupt:
+            stop_watching("dev123")
+    else:
+        # Test onboarding (optionally with several synced history files)
+        result = onboard_user("dev123", sys.argv[1:] or None)
+        print(json.dumps(result, indent=2))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Classification tables for Meta² Onboarding
+
+The tables below are the source of truth. compile_rules() turns them into the
+lookup structures the analyzers use; load_rules() compiles them once per
+process. Compiling takes a few microseconds, less than reading any snapshot
+of the result would.
+"""
+
+# Bump whenever the shape of the compiled tables changes
+RULES_VERSION = 2
+
+# Command categories, checked in order: (category, match kind, needles)
+CATEGORY_RULES = (
+    ("git_workflow", "prefix", ("git",)),
+    ("api_usage", "contains", ("curl", "http", "api")),
+    ("dev_tools", "contains", ("python", "node", "npm", "cargo")),
+    ("file_ops", "contains", ("cd", "ls", "mkdir", "cp", "mv")),
+)
+
+# Key order of the profile's "patterns" section
+PATTERN_CATEGORIES = ("git_workflow", "dev_tools", "api_usage", "file_ops")
+
+# Preference hints, checked in order: (preference, value, needles)
+PREFERENCE_HINTS = (
+    ("preferred_editor", "vscode", ("code", "vscode")),
+    ("preferred_editor", "vim", ("vim", "nvim")),
+    ("git_style", "github_cli", ("gh ",)),
+    ("api_tool", "curl", ("curl",)),
+    ("api_tool", "httpie", ("http",)),
+)
+
+_rules = None
+
+
+def compile_rules():
+    """Build the lookup tables used by the analyzers"""
+    categories = tuple(
+        (name, kind == "prefix", tuple(needles))
+        for name, kind, needles in CATEGORY_RULES
+    )
+    hints = {}
+    for pref, value, needles in PREFERENCE_HINTS:
+        hints.setdefault(pref, []).append((value, tuple(needles)))
+
+    return {
+        "version": RULES_VERSION,
+        "categories": categories,
+        "category_names": PATTERN_CATEGORIES,
+        "preference_hints": {pref: tuple(v) for pref, v in hints.items()},
+    }
+
+
+def load_rules():
+    """Return the compiled tables, compiling them on first use"""
+    global _rules
+    if _rules is None:
+        _rules = compile_rules()
+    return _rules
+
+
+if __name__ == "__main__":
+    rules = load_rules()
+    print(f"✅ Rules v{RULES_VERSION}: {len(rules['categories'])} categories, "
+          f"{len(rules['preference_hints'])} preference hints")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Cross-process profile and config cache in a shared memory-mapped file
+
+Every API worker maps the same file, so a profile parsed once is served to
+all of them. The file is a fixed table of slots grouped into small sets;
+a key hashes to one set and may sit in any of its slots. Values are stored
+marshalled, so a hit needs no file read and no JSON parsing.
+
+Reads take no lock. Each slot carries a sequence counter that a writer makes
+odd while it rewrites the slot and even again when done (a seqlock); a
+reader copies the slot between two reads of the counter and retries if it
+changed. Writers serialize on an flock of the file. Entries carry a version
+chosen by the caller (e.g. the source file's mtime) and a read asking for a
+different version misses. A full set evicts its least recently read entry.
+
+The file name encodes the layout (cache.v1.512x16384.shm), so workers of a
+rolling deploy with another layout map a file of their own; a file that
+others may have mapped is never truncated or reformatted.
+"""
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): callers run without the cache
+    fcntl = None
+
+MAGIC = b"M2PC"
+LAYOUT_VERSION = 1
+# magic, layout version, slot count, slot size
+FILE_HEADER = struct.Struct("<4sIII")
+FILE_HEADER_SIZE = 64
+# seq, key hash, version, last read (ns), key length, value length
+SLOT_HEADER = struct.Struct("<QQqQII")
+SEQ = struct.Struct("<Q")
+TOUCHED = struct.Struct("<Q")
+TOUCHED_OFFSET = 24
+
+DEFAULT_SLOTS = 512
+DEFAULT_SLOT_SIZE = 16 * 1024
+# Slots a key may occupy
+WAYS = 4
+# Attempts before a read racing a writer gives up and misses
+READ_RETRIES = 32
+
+
+def layout_path(path, slots, slot_size):
+    """cache.shm -> cache.v1.512x16384.shm: one file per layout"""
+    root, ext = os.path.splitext(str(path))
+    return f"{root}.v{LAYOUT_VERSION}.{slots}x{slot_size}{ext}"
+
+
+def _key_hash(key):
+    # hash() is salted per process, so use a stable digest; 0 marks a free slot
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+class SharedCache:
+    def __init__(self, path, slots=DEFAULT_SLOTS, slot_size=DEFAULT_SLOT_SIZE):
+        if fcntl is None:
+            raise OSError("SharedCache needs fcntl.flock")
+        self.slots = slots - slots % WAYS
+        self.slot_size = slot_size
+        self.sets = self.slots // WAYS
+        self.size = FILE_HEADER_SIZE + self.slots * slot_size
+        self.path = layout_path(path, self.slots, slot_size)
+        self.pid = None
+        self._open()
+
+    def _open(self):
+        # flock belongs to the open file description, which a fork shares,
+        # so every process opens the file itself
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.pid = os.getpid()
+        try:
+            with self._locked():
+                header = os.pread(self.fd, FILE_HEADER.size, 0)
+                expected = FILE_HEADER.pack(MAGIC, LAYOUT_VERSION, self.slots, self.slot_size)
+                size = os.fstat(self.fd).st_size
+                if size == 0:
+                    # New file: nobody has it mapped yet
+                    os.ftruncate(self.fd, self.size)
+                    os.pwrite(self.fd, expected, 0)
+                elif size != self.size or header.strip(b"\0") and header != expected:
+                    raise OSError(f"{self.path} does not have the expected cache layout")
+                elif header != expected:
+                    # Creator died before writing the header; the slots are still empty
+                    os.pwrite(self.fd, expected, 0)
+            self.mm = mmap.mmap(self.fd, self.size)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _ensure_open(self):
+        if self.pid != os.getpid():
+            self._open()
+
+    def _locked(self):
+        return _FileLock(self.fd)
+
+    def close(self):
+        if self.pid == os.getpid():
+            self.mm.close()
+            os.close(self.fd)
+        self.pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _slot_offsets(self, key_hash):
+        first = (key_hash % self.sets) * WAYS
+        return [FILE_HEADER_SIZE + (first + way) * self.slot_size for way in range(WAYS)]
+
+    def get(self, key, version=None):
+        """Cached value for key (a str), or None if absent or of another version"""
+        self._ensure_open()
+        key = key.encode()
+        key_hash = _key_hash(key)
+        mm = self.mm
+        for offset in self._slot_offsets(key_hash):
+            for _ in range(READ_RETRIES):
+                seq = SEQ.unpack_from(mm, offset)[0]
+                if seq & 1:
+                    time.sleep(0)
+                    continue
+                _, slot_hash, slot_version, _, key_len, value_len = SLOT_HEADER.unpack_from(mm, offset)
+                if slot_hash != key_hash:
+                    break
+                start = offset + SLOT_HEADER.size
+                data = mm[start:start + key_len + value_len]
+                if SEQ.unpack_from(mm, offset)[0] != seq:
+                    continue
+                if data[:key_len] != key:
+                    break
+                if version is not None and slot_version != version:
+                    return None
+                # Racy by design: a lost update only skews eviction order
+                TOUCHED.pack_into(mm, offset + TOUCHED_OFFSET, time.time_ns())
+                return marshal.loads(data[key_len:])
+        return None
+
+    def put(self, key, value, version=0):
+        """Store a marshallable value; False if it does not fit in a slot"""
+        self._ensure_open()
+        key = key.encode()
+        payload = key + marshal.dumps(value)
+        if SLOT_HEADER.size + len(payload) > self.slot_size:
+            self.invalidate(key.decode())
+            return False
+        key_hash = _key_hash(key)
+        mm = self.mm
+        with self._locked():
+            offset = self._find_slot(key, key_hash)
+            # An odd count under the lock means a writer died mid-update
+            seq = (SEQ.unpack_from(mm, offset)[0] | 1) - 1
+            SEQ.pack_into(mm, offset, seq + 1)
+            start = offset + SLOT_HEADER.size
+            mm[start:start + len(payload)] = payload
+            SLOT_HEADER.pack_into(mm, offset, seq + 1, key_hash, version, time.time_ns(),
+                                  len(key), len(payload) - len(key))
+            SEQ.pack_into(mm, offset, seq + 2)
+        return True
+
+    def _find_slot(self, key, key_hash):
+        # Same key, else a free slot, else the least recently read one
+        candidates = []
+        for offset in self._slot_offsets(key_hash):
+            _, slot_hash, _, touched, key_len, _ = SLOT_HEADER.unpack_from(self.mm, offset)
+            start = offset + SLOT_HEADER.size
+            if slot_hash == key_hash and self.mm[start:start + key_len] == key:
+                return offset
+            candidates.append((slot_hash != 0, touched, offset))
+        return min(candidates)[2]
+
+    def invalidate(self, key):
+        """Drop a key from the cache"""
+        self._ensure_open()
+        key = key.encode()
+        key_hash = _key_hash(key)
+        mm = self.mm
+        with self._locked():
+            for offset in self._slot_offsets(key_hash):
+                seq, slot_hash, _, _, key_len, _ = SLOT_HEADER.unpack_from(mm, offset)
+                start = offset + SLOT_HEADER.size
+                if slot_hash == key_hash and mm[start:start + key_len] == key:
+                    seq = (seq | 1) - 1
+                    SEQ.pack_into(mm, offset, seq + 1)
+                    SLOT_HEADER.pack_into(mm, offset, seq + 1, 0, 0, 0, 0, 0)
+                    SEQ.pack_into(mm, offset, seq + 2)
+
+    def stats(self):
+        """Number of occupied slots out of the total"""
+        self._ensure_open()
+        used = sum(1 for slot in range(self.slots)
+                   if SLOT_HEADER.unpack_from(self.mm, FILE_HEADER_SIZE + slot * self.slot_size)[1])
+        return {"slots": self.slots, "used": used, "slot_size": self.slot_size}
+
+
+class _FileLock:
+    def __init__(self, fd):
+        self.fd = fd
+
+    def __enter__(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted profile digests for LLM prompts
+
+A profile carries full pattern lists that grow with the user's history.
+profile_digest() compresses it into a few ranked lines: preferences first,
+then tools by use, the most frequent commands, and example command shapes
+per pattern category. Repeats are collapsed to their shape ("git commit
+(12x)") and anything already mentioned is skipped. Items are added in rank
+order until the token budget is spent, so the prompt size is bounded no
+matter how large the history is.
+
+estimate_tokens() is a local approximation of BPE tokenizers: every run of
+up to four word characters and every punctuation mark counts as a token. It
+slightly overestimates, which keeps digests inside the budget.
+"""
+import re
+from collections import Counter
+
+from tool_catalog import load_catalog
+
+DEFAULT_TOKEN_BUDGET = 300
+# Words of a command kept as its shape
+SHAPE_WORDS = 2
+EXAMPLES_PER_CATEGORY = 5
+
+TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Approximate token count of text"""
+    return len(TOKEN_RE.findall(text))
+
+
+def command_shape(command):
+    """First words of a command without flags or arguments: 'git commit'"""
+    words = []
+    for word in command.split():
+        if word.startswith('-') or len(words) == SHAPE_WORDS:
+            break
+        words.append(word)
+    return " ".join(words) or command.split(None, 1)[0]
+
+
+class _Digest:
+    """Lines that are only extended while the token budget allows"""
+
+    def __init__(self, budget):
+        self.remaining = budget
+        self.lines = []
+
+    def add_line(self, text):
+        cost = estimate_tokens(text) + 1
+        if cost > self.remaining:
+            return False
+        self.lines.append(text)
+        self.remaining -= cost
+        return True
+
+    def add_items(self, label, items):
+        """'label: a, b, c' with as many items as fit, in order"""
+        line = None
+        for item in items:
+            piece = f"{label}: {item}" if line is None else f", {item}"
+            cost = estimate_tokens(piece) + (1 if line is None else 0)
+            if cost > self.remaining:
+                break
+            line = piece if line is None else line + piece
+            self.remaining -= cost
+        if line is not None:
+            self.lines.append(line)
+        return line is not None
+
+    def text(self):
+        return "\n".join(self.lines)
+
+
+def profile_digest(profile, budget=DEFAULT_TOKEN_BUDGET):
+    """Ranked, de-duplicated summary of a profile within a token budget"""
+    digest = _Digest(budget)
+    counts = profile.get("top_commands", {})
+    mentioned = set()
+
+    digest.add_line(f"User {profile.get('user_id', '?')}: "
+                    f"{profile.get('command_count', 0)} commands analysed")
+
+    preferences = [f"{name}={value}" for name, value in profile.get("preferences", {}).items()
+                   if value != "unknown"]
+    digest.add_items("Preferences", preferences)
+
+    catalog = load_catalog()
+    tools = sorted(profile.get("tools", []), key=lambda tool: -counts.get(tool, 0))
+    mentioned.update(tools)
+    digest.add_items("Tools", [f"{tool} ({catalog.category(tool) or 'tool'})" for tool in tools])
+
+    frequent = [f"{argv0} ({count}x)" for argv0, count in
+                sorted(counts.items(), key=lambda item: -item[1]) if argv0 not in mentioned]
+    digest.add_items("Other frequent commands", frequent)
+
+    patterns = sorted(profile.get("patterns", {}).items(), key=lambda item: -len(item[1]))
+    sizes = [f"{name} {len(commands)}" for name, commands in patterns if commands]
+    digest.add_items("Recent command mix", sizes)
+
+    for name, commands in patterns:
+        shapes = Counter(command_shape(command) for command in commands)
+        examples = [shape if count == 1 else f"{shape} ({count}x)"
+                    for shape, count in shapes.most_common(EXAMPLES_PER_CATEGORY)]
+        digest.add_items(f"{name} examples", examples)
+
+    return digest.text()
+
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Profile sync helpers: deltas, field selection and response compression
+
+Deltas are JSON merge patches (RFC 7386): keys present in the patch replace
+the client's copy, null deletes a key, and nested objects are patched
+recursively. Clients that re-poll send the version they hold and get only
+the patch back.
+"""
+import gzip
+import json
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def merge_patch(old, new):
+    """JSON merge patch that turns `old` into `new`"""
+    patch = {}
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                patch[key] = merge_patch(old[key], value)
+            else:
+                patch[key] = value
+    return patch
+
+
+def apply_merge_patch(doc, patch):
+    """Apply a JSON merge patch (client side counterpart of merge_patch)"""
+    result = dict(doc)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = apply_merge_patch(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def parse_fields(fields):
+    """Accept "a,b.c" or an iterable of field names; None means everything"""
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = [field.strip() for field in fields if field and field.strip()]
+    return fields or None
+
+
+def select_fields(doc, fields):
+    """Keep only the requested (optionally dotted) fields of a document"""
+    fields = parse_fields(fields)
+    if fields is None:
+        return doc
+    selected = {}
+    for field in fields:
+        parts = field.split('.')
+        value = doc
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = selected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return selected
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings a client accepts, by q-value, from an Accept-Encoding header"""
+    accepted = {}
+    for item in (accept_encoding or "").split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def encode_json(payload, accept_encoding=None):
+    """Serialize a payload compactly and compress it if the client allows
+
+    Returns (body, content_encoding); content_encoding is None when the
+    body is sent as is. zstd is preferred when the zstandard package is
+    installed, then gzip.
+    """
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get('*', 0)
+    if accepted.get('zstd', wildcard) > 0:
+        zstandard = _zstd()
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body), 'zstd'
+    if accepted.get('gzip', wildcard) > 0:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), 'gzip'
+    return body, None
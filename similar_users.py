@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Nearest-neighbour index over onboarding profiles
+
+Each profile becomes a sparse feature vector (tool use, argv0 frequencies,
+category shares). Small fleets are searched exactly: with NumPy through
+per-feature posting arrays that are updated in place as users are added,
+without it by scanning every vector. Large fleets use MinHash/LSH buckets
+to pick the users sharing the most bands with the query and rescore them
+with exact cosine similarity.
+"""
+import heapq
+import json
+import math
+import sqlite3
+import zlib
+from collections import Counter
+from itertools import chain, islice
+
+try:
+    import numpy as np
+except ImportError:  # exact search falls back to pure Python
+    np = None
+
+# Exact search up to this many users, LSH beyond it. A pure Python scan
+# costs about 3 µs per user, so without NumPy LSH takes over early.
+NUMPY_MAX_USERS = 20000
+PYTHON_MAX_USERS = 250
+
+# One-permutation MinHash: SIGNATURE_BINS bins grouped into LSH_BANDS bands
+SIGNATURE_BINS = 96
+LSH_BANDS = 12
+# Weighted features are expanded into this many tokens at full weight
+WEIGHT_LEVELS = 12
+# Users rescored per LSH query, picked by the number of bands they share
+LSH_CANDIDATES = 64
+# Buckets above this size ("everyone uses git") are too costly to count
+# and only used when the others come up short
+MAX_COUNTED_BUCKET = 500
+
+_HASH_MASK = 0xFFFFFFFF
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    user_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    vector TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS features_seq ON features(seq);
+"""
+
+
+def profile_features(profile):
+    """Sparse feature vector for a profile: {feature: weight}"""
+    features = {}
+    for tool in profile.get("tools", []):
+        features[f"tool:{tool}"] = 1.0
+
+    frequencies = profile.get("top_commands", {})
+    total = sum(frequencies.values())
+    for argv0, count in frequencies.items():
+        features[f"cmd:{argv0}"] = count / total
+
+    patterns = profile.get("patterns", {})
+    categorized = sum(len(commands) for commands in patterns.values())
+    for category, commands in patterns.items():
+        if commands:
+            features[f"cat:{category}"] = len(commands) / categorized
+    return features
+
+
+def _normalize(features):
+    norm = math.sqrt(sum(w * w for w in features.values()))
+    if not norm:
+        return {}
+    return {name: w / norm for name, w in features.items()}
+
+
+def _dot(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b[name] for name, w in a.items() if name in b)
+
+
+def _token_hash(token):
+    return zlib.crc32(token.encode())
+
+
+def minhash_signature(features):
+    """One-permutation MinHash over weight-expanded feature tokens
+
+    Every token is hashed once and routed to a bin by its low bits; each
+    bin keeps its minimum. Empty bins borrow from the next non-empty bin
+    so sparse profiles still get a full signature.
+    """
+    bins = [None] * SIGNATURE_BINS
+    for name, weight in features.items():
+        copies = max(1, min(WEIGHT_LEVELS, math.ceil(weight * WEIGHT_LEVELS)))
+        for level in range(copies):
+            h = _token_hash(f"{name}#{level}")
+            slot = h % SIGNATURE_BINS
+            value = h // SIGNATURE_BINS
+            if bins[slot] is None or value < bins[slot]:
+                bins[slot] = value
+
+    if all(value is None for value in bins):
+        return None
+    for slot in range(SIGNATURE_BINS):
+        if bins[slot] is None:
+            step = 1
+            while bins[(slot + step) % SIGNATURE_BINS] is None:
+                step += 1
+            bins[slot] = (bins[(slot + step) % SIGNATURE_BINS] + step) & _HASH_MASK
+    return tuple(bins)
+
+
+def _band_keys(signature):
+    rows = SIGNATURE_BINS // LSH_BANDS
+    return [(band,) + signature[band * rows:(band + 1) * rows] for band in range(LSH_BANDS)]
+
+
+class _Postings:
+    """Rows and weights of the users that have one feature, as growable arrays
+
+    Removed entries are pointed at the unused row 0 with weight 0 and
+    dropped when they outnumber the live ones.
+    """
+
+    def __init__(self):
+        self.rows = np.zeros(4, dtype=np.int64)
+        self.weights = np.zeros(4, dtype=np.float32)
+        self.size = 0
+        self.positions = {}   # row -> index in the arrays
+
+    def add(self, row, weight):
+        if self.size == len(self.rows):
+            self.rows = np.concatenate((self.rows, np.zeros_like(self.rows)))
+            self.weights = np.concatenate((self.weights, np.zeros_like(self.weights)))
+        self.rows[self.size] = row
+        self.weights[self.size] = weight
+        self.positions[row] = self.size
+        self.size += 1
+
+    def remove(self, row):
+        index = self.positions.pop(row)
+        self.rows[index] = 0
+        self.weights[index] = 0.0
+        if len(self.positions) * 2 < self.size:
+            live = np.fromiter(sorted(self.positions.values()), dtype=np.int64, count=len(self.positions))
+            self.size = len(live)
+            self.rows[:self.size] = self.rows[live]
+            self.weights[:self.size] = self.weights[live]
+            self.positions = {int(row): index for index, row in enumerate(self.rows[:self.size])}
+
+    def __bool__(self):
+        return bool(self.positions)
+
+
+class SimilarUserIndex:
+    def __init__(self, use_numpy=True):
+        self.numpy = use_numpy and np is not None
+        self.vectors = {}      # user_id -> normalized sparse vector
+        self.bands = {}        # user_id -> LSH band keys
+        self.buckets = {}      # band key -> set of user_ids
+        self.postings = {}     # feature -> _Postings (with NumPy)
+        self.rows = {}         # user_id -> row in the postings
+        self.row_users = [None]  # row -> user_id; row 0 is never used
+        self.free_rows = []
+        self.seq = 0           # last FeatureStore change applied
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def backend(self):
+        """How queries are answered at the current size"""
+        if len(self.vectors) > (NUMPY_MAX_USERS if self.numpy else PYTHON_MAX_USERS):
+            return "minhash/lsh"
+        return "numpy" if self.numpy else "python"
+
+    def add(self, user_id, features):
+        """Insert or replace a user's feature vector"""
+        self.remove(user_id)
+        vector = _normalize(features)
+        self.vectors[user_id] = vector
+        signature = minhash_signature(vector)
+        keys = _band_keys(signature) if signature else []
+        self.bands[user_id] = keys
+        for key in keys:
+            self.buckets.setdefault(key, set()).add(user_id)
+
+        if self.numpy:
+            row = self.free_rows.pop() if self.free_rows else len(self.row_users)
+            if row == len(self.row_users):
+                self.row_users.append(user_id)
+            else:
+                self.row_users[row] = user_id
+            self.rows[user_id] = row
+            for name, weight in vector.items():
+                postings = self.postings.get(name)
+                if postings is None:
+                    postings = self.postings[name] = _Postings()
+                postings.add(row, weight)
+
+    def remove(self, user_id):
+        if user_id not in self.vectors:
+            return
+        vector = self.vectors.pop(user_id)
+        for key in self.bands.pop(user_id, []):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(user_id)
+                if not bucket:
+                    del self.buckets[key]
+
+        row = self.rows.pop(user_id, None)
+        if row is not None:
+            for name in vector:
+                postings = self.postings[name]
+                postings.remove(row)
+                if not postings:
+                    del self.postings[name]
+            self.row_users[row] = None
+            self.free_rows.append(row)
+
+    def sync(self, store):
+        """Apply changes written to a FeatureStore since the last sync"""
+        for seq, user_id, features in store.changes(self.seq):
+            self.add(user_id, features)
+            self.seq = seq
+        return self
+
+    def query(self, features, k=5, exclude=()):
+        """Top-k most similar users as [(user_id, cosine)]"""
+        vector = _normalize(features)
+        if not vector or not self.vectors:
+            return []
+        exclude = set(exclude)
+        backend = self.backend()
+        if backend == "numpy":
+            return self._query_numpy(vector, k, exclude)
+        if backend == "python":
+            return self._query_exact(vector, k, exclude)
+        return self._query_lsh(vector, k, exclude)
+
+    def _top(self, vector, user_ids, k):
+        scored = ((_dot(vector, self.vectors[user_id]), user_id) for user_id in user_ids)
+        best = heapq.nlargest(k, scored)
+        return [(user_id, round(score, 4)) for score, user_id in best if score > 0]
+
+    def _query_exact(self, vector, k, exclude):
+        return self._top(vector, (user_id for user_id in self.vectors if user_id not in exclude), k)
+
+    def _query_lsh(self, vector, k, exclude):
+        signature = minhash_signature(vector)
+        buckets = [self.buckets.get(key) for key in _band_keys(signature)]
+        buckets = [bucket for bucket in buckets if bucket]
+        collisions = Counter(chain.from_iterable(
+            bucket for bucket in buckets if len(bucket) <= MAX_COUNTED_BUCKET))
+        for user_id in exclude:
+            collisions.pop(user_id, None)
+
+        wanted = max(k, LSH_CANDIDATES)
+        candidates = [user_id for user_id, _ in collisions.most_common(wanted)]
+        for bucket in buckets:
+            if len(candidates) >= wanted:
+                break
+            if len(bucket) > MAX_COUNTED_BUCKET:
+                candidates.extend(user_id for user_id in islice(bucket, wanted)
+                                  if user_id not in exclude)
+        return self._top(vector, set(candidates), k)
+
+    def _query_numpy(self, vector, k, exclude):
+        scores = np.zeros(len(self.row_users), dtype=np.float32)
+        for name, weight in vector.items():
+            postings = self.postings.get(name)
+            if postings is not None:
+                # A row appears once per feature, except the dead row 0
+                size = postings.size
+                scores[postings.rows[:size]] += postings.weights[:size] * weight
+        scores[0] = 0.0
+
+        take = min(len(scores), k + len(exclude))
+        top = np.argpartition(-scores, take - 1)[:take]
+        ranked = sorted(top, key=lambda row: -scores[row])
+        result = [(self.row_users[row], round(float(scores[row]), 4)) for row in ranked
+                  if scores[row] > 0 and self.row_users[row] not in exclude]
+        return result[:k]
+
+
+class FeatureStore:
+    """Persisted feature vectors, with a change sequence for incremental sync"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def put(self, user_id, features):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO features VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM features), ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET seq = excluded.seq, vector = excluded.vector",
+                (user_id, json.dumps(features))
+            )
+
+    def changes(self, since_seq=0):
+        """Yield (seq, user_id, features) written after since_seq"""
+        rows = self.conn.execute(
+            "SELECT seq, user_id, vector FROM features WHERE seq > ? ORDER BY seq", (since_seq,))
+        for seq, user_id, vector in rows:
+            yield seq, user_id, json.loads(vector)
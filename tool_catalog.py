@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Tool catalog: which argv0s are developer tools, and of what kind
+
+The catalog merges a bundled lexicon of known tools with categories
+(tool_lexicon.txt), the executables in user-installed $PATH directories and
+the binaries recorded by package managers (cargo, pipx, Homebrew). Tools
+found only on PATH or in a manifest get the category "installed"; system
+directories (/usr/bin, ...) hold thousands of non-tools and are only
+trusted through the lexicon.
+
+Building means listing directories, so the index is kept in a marshal
+snapshot with a fingerprint of its sources (lexicon, PATH directories and
+manifests with their mtimes) and rebuilt only when that changes. A lookup
+is a dict probe.
+"""
+import json
+import marshal
+import os
+import re
+import sys
+import time
+
+# Bump whenever the shape of the snapshot changes
+CATALOG_VERSION = 1
+
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool_lexicon.txt")
+SNAPSHOT_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "meta2", f"tool_catalog.v{CATALOG_VERSION}.snapshot"
+)
+
+# Recognised but never reported as tools (ls, cd, grep, ...)
+EXCLUDED_CATEGORIES = frozenset({"core"})
+INSTALLED = "installed"
+
+SYSTEM_DIRS = frozenset({
+    "/bin", "/sbin", "/usr/bin", "/usr/sbin", "/usr/local/sbin", "/usr/games",
+    "/usr/local/games", "/snap/bin", "/usr/libexec",
+})
+HOMEBREW_CELLARS = ("/opt/homebrew/Cellar", "/usr/local/Cellar", "/home/linuxbrew/.linuxbrew/Cellar")
+
+# How often a long-running process re-checks the fingerprint
+RECHECK_SECONDS = 60
+
+# python3.12 -> python, gcc-13 -> gcc, pip3 -> pip
+VERSION_SUFFIX = re.compile(r'[-.]?\d+(?:\.\d+)*$')
+CRATES_LINE = re.compile(r'^"([^" ]+)[^"]*"\s*=\s*\[(.*)\]')
+
+_catalog = None
+_checked_at = 0.0
+
+
+class ToolCatalog:
+    def __init__(self, categories, tools, fingerprint=None):
+        self.categories = categories
+        self.tools = tools
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.tools)
+
+    def category(self, argv0):
+        """Category of a command's argv0, or None if it is not a known tool"""
+        index = self.tools.get(argv0)
+        if index is None:
+            if '/' in argv0:
+                argv0 = argv0.rsplit('/', 1)[1]
+                index = self.tools.get(argv0)
+            if index is None:
+                index = self.tools.get(VERSION_SUFFIX.sub('', argv0))
+                if index is None:
+                    return None
+        return self.categories[index]
+
+    def is_tool(self, argv0):
+        category = self.category(argv0)
+        return category is not None and category not in EXCLUDED_CATEGORIES
+
+    def by_category(self):
+        grouped = {}
+        for name, index in self.tools.items():
+            grouped.setdefault(self.categories[index], []).append(name)
+        return grouped
+
+
+def read_lexicon(path=LEXICON_PATH):
+    """{tool: category} from the bundled lexicon; the first category wins"""
+    tools = {}
+    category = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('[') and line.endswith(']'):
+                category = line[1:-1]
+                continue
+            for name in line.split():
+                tools.setdefault(name, category)
+    return tools
+
+
+def user_path_dirs(path_env=None):
+    """Directories on PATH that hold user-installed executables"""
+    dirs = []
+    for directory in (os.environ.get("PATH", "") if path_env is None else path_env).split(os.pathsep):
+        directory = os.path.normpath(directory) if directory else ""
+        if directory and directory not in SYSTEM_DIRS and directory not in dirs:
+            dirs.append(directory)
+    return dirs
+
+
+def _cargo_manifest():
+    return os.path.join(os.environ.get("CARGO_HOME") or os.path.expanduser("~/.cargo"), ".crates.toml")
+
+
+def _pipx_venvs():
+    home = os.environ.get("PIPX_HOME")
+    candidates = [home] if home else [os.path.expanduser("~/.local/pipx"),
+                                      os.path.expanduser("~/.local/share/pipx")]
+    return [os.path.join(candidate, "venvs") for candidate in candidates]
+
+
+def _sources(path_env=None):
+    return ([LEXICON_PATH] + user_path_dirs(path_env) + [_cargo_manifest()]
+            + _pipx_venvs() + list(HOMEBREW_CELLARS))
+
+
+def fingerprint(path_env=None):
+    """(source, mtime) for everything the catalog is built from"""
+    stamps = []
+    for source in _sources(path_env):
+        try:
+            stamps.append((source, os.stat(source).st_mtime_ns))
+        except OSError:
+            stamps.append((source, -1))
+    return tuple(stamps)
+
+
+def _executables(directory):
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mode & 0o111:
+                        yield entry.name
+                except OSError:
+                    continue
+    except OSError:
+        return
+
+
+def manifest_tools():
+    """Binaries recorded by cargo, pipx and Homebrew"""
+    names = set()
+    try:
+        with open(_cargo_manifest()) as f:
+            for line in f:
+                match = CRATES_LINE.match(line)
+                if match:
+                    names.update(re.findall(r'"([^"]+)"', match.group(2)) or [match.group(1)])
+    except OSError:
+        pass
+
+    for venvs in _pipx_venvs():
+        try:
+            packages = os.listdir(venvs)
+        except OSError:
+            continue
+        for package in packages:
+            try:
+                with open(os.path.join(venvs, package, "pipx_metadata.json")) as f:
+                    apps = json.load(f)["main_package"]["apps"]
+            except (OSError, ValueError, KeyError, TypeError):
+                apps = [package]
+            names.update(apps)
+
+    for cellar in HOMEBREW_CELLARS:
+        try:
+            formulae = os.listdir(cellar)
+        except OSError:
+            continue
+        for formula in formulae:
+            names.add(formula)
+            try:
+                versions = os.listdir(os.path.join(cellar, formula))
+            except OSError:
+                continue
+            for version in versions:
+                names.update(_executables(os.path.join(cellar, formula, version, "bin")))
+    return names
+
+
+def build_catalog(path_env=None):
+    """Build the catalog from the lexicon, PATH and package manifests"""
+    stamps = fingerprint(path_env)
+    lexicon = read_lexicon()
+    installed = manifest_tools()
+    for directory in user_path_dirs(path_env):
+        installed.update(_executables(directory))
+    for name in installed:
+        lexicon.setdefault(name, INSTALLED)
+
+    categories = tuple(sorted(set(lexicon.values())))
+    index = {category: i for i, category in enumerate(categories)}
+    tools = {name: index[category] for name, category in lexicon.items()}
+    return ToolCatalog(categories, tools, stamps)
+
+
+def write_snapshot(catalog, path=SNAPSHOT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = marshal.dumps((CATALOG_VERSION, catalog.fingerprint, catalog.categories, catalog.tools))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_catalog(path=SNAPSHOT_PATH):
+    """Return the catalog, from the snapshot when its sources are unchanged"""
+    global _catalog, _checked_at
+    now = time.monotonic()
+    if _catalog is not None and now - _checked_at < RECHECK_SECONDS:
+        return _catalog
+    _checked_at = now
+
+    stamps = fingerprint()
+    if _catalog is not None and _catalog.fingerprint == stamps:
+        return _catalog
+
+    try:
+        with open(path, 'rb') as f:
+            version, snapshot_stamps, categories, tools = marshal.loads(f.read())
+        if version != CATALOG_VERSION or snapshot_stamps != stamps:
+            raise ValueError("stale tool catalog snapshot")
+        catalog = ToolCatalog(categories, tools, snapshot_stamps)
+    except (OSError, ValueError, EOFError, TypeError):
+        catalog = build_catalog()
+        try:
+            write_snapshot(catalog, path)
+        except OSError:
+            # Read-only cache dir: keep the catalog in memory only
+            pass
+
+    _catalog = catalog
+    return _catalog
+
+
+if __name__ == "__main__":
+    catalog = build_catalog()
+    write_snapshot(catalog)
+    print(f"✅ Wrote tool catalog v{CATALOG_VERSION} to {SNAPSHOT_PATH}")
+    for category, names in sorted(catalog.by_category().items()):
+        print(f"   {category}: {len(names)} tools")
+    for argv0 in sys.argv[1:]:
+        print(f"🔍 {argv0}: {catalog.category(argv0) or 'unknown'}")